@@ -1,17 +1,37 @@
 from flask import Flask
+import db
+import auth_helpers
 from main_routes import main_bp
 from auth_routes import auth_bp
 from media_routes import media_bp
+from search_routes import search_bp
+from similarity_routes import similarity_bp
+from recommendation_routes import recommendation_bp
+from compare_routes import compare_bp
 
 app = Flask(__name__)
 app.secret_key = (
     "your-secret-key-change-this-in-production"  # Change this in production!
 )
 
+# Keep role/permission bitmasks in the signed session cookie so protected
+# routes can be authorized without a database query
+app.config["SESSION_AUTH"] = True
+
+# Release the request-scoped DB connection after each request
+db.init_app(app)
+
+# Queue a (rate-limited) last-seen update for logged-in users
+auth_helpers.init_app(app)
+
 # Register blueprints
 app.register_blueprint(main_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(media_bp)
+app.register_blueprint(search_bp)
+app.register_blueprint(similarity_bp)
+app.register_blueprint(recommendation_bp)
+app.register_blueprint(compare_bp)
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,6 +1,6 @@
 """Helper script to assign roles to users."""
 from db import get_connection
-from auth_helpers import get_user_by_username
+from auth_helpers import get_user_by_username, invalidate_user_auth
 
 
 def assign_role_to_user(username, role_name):
@@ -46,6 +46,7 @@ def assign_role_to_user(username, role_name):
     conn.commit()
     cur.close()
     conn.close()
+    invalidate_user_auth(user["id"])
 
     print(f"✅ Successfully assigned role '{role_name}' to user '{username}'.")
     return True
@@ -82,6 +83,8 @@ def remove_role_from_user(username, role_name):
     affected = cur.rowcount
     cur.close()
     conn.close()
+    if affected > 0:
+        invalidate_user_auth(user["id"])
 
     if affected > 0:
         print(f"✅ Successfully removed role '{role_name}' from user '{username}'.")
@@ -1,26 +1,37 @@
 """Audit logging helper functions."""
-from datetime import datetime
+import csv
+import io
+from datetime import datetime, timedelta
 from flask import session
-from db import get_connection
+from pagination_helpers import finish_page, get_page_size, read_cursor
+from write_behind_helpers import BatchWriter
+
+# Audit rows are written behind the request by a background thread.
+AUDIT_WRITER_CONFIG = {
+    "max_queue": 10000,  # Rows held in memory before add() applies back-pressure
+    "batch_size": 500,  # Rows per multi-row INSERT
+    "flush_interval": 1.0,  # Max seconds a row waits before it is written
+    "put_timeout": 0.05,  # Max seconds a request waits on a full queue
+}
+
+_audit_writer = BatchWriter(
+    "audit",
+    "INSERT INTO audit_logs (user_id, action, created_at) VALUES (%s, %s, %s)",
+    **AUDIT_WRITER_CONFIG,
+)
 
 
 def log_action(user_id, action):
-    """Log an action to the audit_logs table."""
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            "INSERT INTO audit_logs (user_id, action) VALUES (%s, %s)",
-            (user_id, action),
-        )
-        conn.commit()
-    except Exception as e:
-        # Log error but don't break the main operation
-        print(f"Error logging audit action: {e}")
-        conn.rollback()
-    finally:
-        cur.close()
-        conn.close()
+    """Queue an action for the audit_logs table (written in the background).
+
+    created_at is taken now, so batching does not shift the logged time.
+    """
+    _audit_writer.add((user_id, action, datetime.now()))
+
+
+def get_audit_writer_stats():
+    """Return the background audit writer's counters (written, dropped, pending...)."""
+    return _audit_writer.stats()
 
 
 def log_action_from_session(action):
@@ -29,37 +40,163 @@ def log_action_from_session(action):
         log_action(session["user_id"], action)
 
 
-def get_audit_logs(limit=100, user_id=None):
-    """Get audit logs, optionally filtered by user."""
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-
-    if user_id:
-        cur.execute(
-            """
-            SELECT al.id, al.user_id, al.action, al.created_at, au.username
-            FROM audit_logs al
-            INNER JOIN app_users au ON al.user_id = au.id
-            WHERE al.user_id = %s
-            ORDER BY al.created_at DESC
-            LIMIT %s
-            """,
-            (user_id, limit),
-        )
-    else:
-        cur.execute(
-            """
-            SELECT al.id, al.user_id, al.action, al.created_at, au.username
-            FROM audit_logs al
-            INNER JOIN app_users au ON al.user_id = au.id
-            ORDER BY al.created_at DESC
-            LIMIT %s
-            """,
-            (limit,),
-        )
+# ============================================
+# AUDIT LOG EXPLORER
+# ============================================
+
+AUDIT_PAGE_SIZE = 50
+
+# Rows per keyset query while streaming a CSV export
+AUDIT_EXPORT_BATCH = 5000
+
+AUDIT_CSV_COLUMNS = ("id", "user_id", "username", "action", "created_at")
+
+# created_at as stored in cursors and CSV exports
+AUDIT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Dates a TIMESTAMP column can hold; ?from= / ?to= are clamped to them
+AUDIT_MIN_DATE = datetime(1970, 1, 1)
+AUDIT_MAX_DATE = datetime(2038, 1, 18)
+
+_AUDIT_SELECT = """
+    SELECT al.id, al.user_id, au.username, al.action, al.created_at
+    FROM audit_logs al
+    LEFT JOIN app_users au ON al.user_id = au.id
+    WHERE 1=1
+"""
+
+
+def _parse_date(value):
+    try:
+        parsed = datetime.strptime(value.strip(), "%Y-%m-%d")
+    except (AttributeError, ValueError):
+        return None
+    # Also keeps the inclusive ?to= bound (next midnight) from overflowing
+    return min(max(parsed, AUDIT_MIN_DATE), AUDIT_MAX_DATE)
+
+
+def read_audit_filters(args):
+    """Explorer filters from ?user= (username), ?action= (prefix), ?from= / ?to= (dates)."""
+    return {
+        "user": (args.get("user") or "").strip(),
+        "action": (args.get("action") or "").strip(),
+        "from": _parse_date(args.get("from")),
+        "to": _parse_date(args.get("to")),
+    }
 
-    logs = cur.fetchall()
-    cur.close()
-    conn.close()
-    return logs
 
+def _audit_filter_clause(filters):
+    """SQL fragment + params for the filters; each one is served by an index.
+
+    - user: idx_audit_logs_user_created
+    - action prefix: idx_audit_logs_action_created
+    - date window: idx_audit_logs_created_id, plus monthly partition pruning
+    """
+    clauses = []
+    params = []
+    if filters["user"]:
+        clauses.append("al.user_id = (SELECT id FROM app_users WHERE username = %s)")
+        params.append(filters["user"])
+    if filters["action"]:
+        prefix = filters["action"]
+        for ch in ("\\", "%", "_"):
+            prefix = prefix.replace(ch, "\\" + ch)
+        clauses.append("al.action LIKE %s")
+        params.append(prefix + "%")
+    if filters["from"]:
+        clauses.append("al.created_at >= %s")
+        params.append(filters["from"])
+    if filters["to"]:
+        # ?to= is inclusive: everything before the next midnight
+        clauses.append("al.created_at < %s")
+        params.append(filters["to"] + timedelta(days=1))
+    return "".join(" AND " + clause for clause in clauses), params
+
+
+def _created_id_keyset(cursor, backward):
+    """WHERE fragment selecting rows after (or before) a (created_at, id) cursor.
+
+    Rows are ordered by created_at DESC, id DESC; created_at is NOT NULL.
+    """
+    created_at, row_id = cursor
+    op = ">" if backward else "<"
+    return (
+        f" AND (al.created_at {op} %s OR (al.created_at = %s AND al.id {op} %s))",
+        [created_at, created_at, row_id],
+    )
+
+
+def _audit_key(row):
+    return [row["created_at"].strftime(AUDIT_TIME_FORMAT), row["id"]]
+
+
+def fetch_audit_page(cur, filters, args):
+    """One keyset page of audit logs, newest first, paged on (created_at, id).
+
+    `args` are the request args carrying ?after= / ?before= / ?page_size=.
+    Returns (rows, page) like fetch_year_id_page().
+    """
+    page_size = get_page_size(args, default=AUDIT_PAGE_SIZE)
+    cursor, backward = read_cursor(args)
+
+    where, params = _audit_filter_clause(filters)
+    query = _AUDIT_SELECT + where
+    if cursor is not None:
+        clause, clause_params = _created_id_keyset(cursor, backward)
+        query += clause
+        params.extend(clause_params)
+
+    direction = "ASC" if backward else "DESC"
+    query += f" ORDER BY al.created_at {direction}, al.id {direction} LIMIT %s"
+    params.append(page_size + 1)
+
+    cur.execute(query, params)
+    return finish_page(cur.fetchall(), page_size, cursor, backward, _audit_key)
+
+
+def iter_audit_logs(cur, filters, batch_size=AUDIT_EXPORT_BATCH):
+    """Yield every matching audit row, newest first, one keyset batch at a time.
+
+    Each batch is its own short indexed query, so an export of any size
+    never holds more than `batch_size` rows or one long-running read.
+    """
+    where, params = _audit_filter_clause(filters)
+    cursor = None
+    while True:
+        query = _AUDIT_SELECT + where
+        batch_params = list(params)
+        if cursor is not None:
+            clause, clause_params = _created_id_keyset(cursor, False)
+            query += clause
+            batch_params.extend(clause_params)
+        query += " ORDER BY al.created_at DESC, al.id DESC LIMIT %s"
+        batch_params.append(batch_size)
+
+        cur.execute(query, batch_params)
+        rows = cur.fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            break
+        cursor = _audit_key(rows[-1])
+
+
+def audit_csv_chunks(cur, filters, batch_size=AUDIT_EXPORT_BATCH):
+    """CSV text of the matching audit logs, yielded in chunks for a streamed response."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(AUDIT_CSV_COLUMNS)
+    for count, row in enumerate(iter_audit_logs(cur, filters, batch_size), start=1):
+        writer.writerow(
+            [
+                row["id"],
+                row["user_id"],
+                row["username"] or "",
+                row["action"],
+                row["created_at"].strftime(AUDIT_TIME_FORMAT),
+            ]
+        )
+        if count % batch_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
@@ -0,0 +1,276 @@
+"""Partition upkeep, retention and archiving for audit_logs.
+
+audit_logs is RANGE-partitioned by month on created_at (migration 0007):
+p_old holds the rows from before partitioning, pYYYYMM one calendar month
+each, and p_future anything past the last monthly partition.
+
+  partitions  Split p_future so each month up to N months ahead has its own
+              partition. Cheap while p_future is still empty, so run it
+              at least monthly (e.g. from cron).
+  retain      Export every partition that ends before the retention cutoff
+              to a compressed columnar file, record it in audit_archives
+              and DROP the partition: a metadata change, not a row-by-row
+              DELETE.
+  status      List partitions (with row estimates) and archives.
+
+Archives are Parquet (zstd) when pyarrow is installed, otherwise NumPy
+.npz files with one compressed array per column.
+
+Usage:
+  python audit_maintenance.py partitions [--months-ahead N]
+  python audit_maintenance.py retain [--months N] [--archive-dir DIR] [--no-archive]
+  python audit_maintenance.py status
+"""
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: archives fall back to .npz
+    pa = pq = None
+
+from db import get_connection
+
+AUDIT_RETENTION_CONFIG = {
+    "retention_months": 12,  # Whole months kept in audit_logs
+    "months_ahead": 3,  # Monthly partitions created ahead of time
+    "archive_dir": "archives/audit_logs",
+    "fetch_size": 50000,  # Rows fetched (and Parquet row group size) when exporting
+}
+
+
+def month_start(dt, offset=0):
+    """Midnight on the first day of dt's month, shifted by `offset` months."""
+    index = dt.year * 12 + dt.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def list_partitions(cur):
+    """[(name, upper bound or None for MAXVALUE, estimated rows)] in range order."""
+    cur.execute(
+        """
+        SELECT PARTITION_NAME,
+               IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL,
+                  FROM_UNIXTIME(PARTITION_DESCRIPTION)),
+               TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs'
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """
+    )
+    partitions = cur.fetchall()
+    if not partitions or partitions[0][0] is None:
+        raise RuntimeError("audit_logs is not partitioned; run python migrate.py first")
+    return partitions
+
+
+def ensure_partitions(conn, months_ahead, now=None):
+    """Give every month up to `months_ahead` months from now its own partition.
+
+    Returns the names of the partitions added.
+    """
+    cur = conn.cursor()
+    bounds = [upper for _, upper, _ in list_partitions(cur) if upper is not None]
+    start = max(bounds)
+    target = month_start(now or datetime.now(), months_ahead + 1)
+
+    added = []
+    while start < target:
+        end = month_start(start, 1)
+        added.append((f"p{start:%Y%m}", end))
+        start = end
+    if added:
+        parts = [
+            f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{end:%Y-%m-%d %H:%M:%S}'))"
+            for name, end in added
+        ]
+        parts.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+        cur.execute(
+            "ALTER TABLE audit_logs REORGANIZE PARTITION p_future INTO ("
+            + ", ".join(parts)
+            + ")"
+        )
+    cur.close()
+    return [name for name, _ in added]
+
+
+def _fetch_partition(conn, name, fetch_size):
+    """Yield lists of (id, user_id, action, created_at) rows of one partition."""
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT id, user_id, action, created_at
+        FROM audit_logs PARTITION ({name})
+        ORDER BY created_at, id
+        """
+    )
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield rows
+    cur.close()
+
+
+def export_partition(conn, name, archive_dir, fetch_size):
+    """Write one partition to a compressed columnar file. Returns (path, rows)."""
+    os.makedirs(archive_dir, exist_ok=True)
+    ext = "parquet" if pq is not None else "npz"
+    path = os.path.join(archive_dir, f"audit_logs_{name}.{ext}")
+    tmp_path = path + ".tmp"
+    total = 0
+
+    if pq is not None:
+        # Streamed: one row group per fetched batch
+        schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("user_id", pa.int64()),
+                ("action", pa.string()),
+                ("created_at", pa.timestamp("s")),
+            ]
+        )
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for rows in _fetch_partition(conn, name, fetch_size):
+                arrays = [
+                    pa.array(values, type=field.type)
+                    for values, field in zip(zip(*rows), schema)
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                total += len(rows)
+    else:
+        columns = ([], [], [], [])
+        for rows in _fetch_partition(conn, name, fetch_size):
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+            total += len(rows)
+        ids, user_ids, actions, created = columns
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                id=np.array(ids, dtype=np.int64),
+                user_id=np.array(user_ids, dtype=np.int64),
+                action=np.array(actions, dtype=str),
+                created_at=np.array(created, dtype="datetime64[s]"),
+            )
+
+    os.replace(tmp_path, path)
+    return path, total
+
+
+def retire_partitions(conn, retention_months, archive_dir, archive=True, now=None):
+    """Archive and drop every partition that ends on or before the retention cutoff.
+
+    Each partition is recorded in audit_archives (and committed) before it
+    is dropped. Returns [(name, rows, path)].
+    """
+    cutoff = month_start(now or datetime.now(), -retention_months)
+    fetch_size = AUDIT_RETENTION_CONFIG["fetch_size"]
+    cur = conn.cursor()
+    retired = []
+    range_start = None
+    for name, upper, _ in list_partitions(cur):
+        if upper is None or upper > cutoff:
+            break
+        if archive:
+            path, rows = export_partition(conn, name, archive_dir, fetch_size)
+        else:
+            cur.execute(f"SELECT COUNT(*) FROM audit_logs PARTITION ({name})")
+            path, rows = None, cur.fetchone()[0]
+        cur.execute(
+            """
+            INSERT INTO audit_archives (partition_name, range_start, range_end, row_count, path)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                range_start = VALUES(range_start),
+                range_end = VALUES(range_end),
+                row_count = VALUES(row_count),
+                path = VALUES(path),
+                archived_at = CURRENT_TIMESTAMP
+            """,
+            (name, range_start, upper, rows, path),
+        )
+        conn.commit()
+        cur.execute(f"ALTER TABLE audit_logs DROP PARTITION {name}")
+        retired.append((name, rows, path))
+        range_start = upper
+    cur.close()
+    return retired
+
+
+def status():
+    conn = get_connection()
+    cur = conn.cursor()
+    print("Partitions:")
+    for name, upper, rows in list_partitions(cur):
+        bound = f"< {upper}" if upper is not None else "MAXVALUE"
+        print(f"  {name:<10} {bound:<24} ~{rows:,} rows")
+    cur.execute(
+        """
+        SELECT partition_name, range_end, row_count, path
+        FROM audit_archives
+        ORDER BY range_end
+        """
+    )
+    archives = cur.fetchall()
+    print("Archived:" if archives else "Archived: (none)")
+    for name, range_end, rows, path in archives:
+        print(f"  {name:<10} < {range_end}  {rows:,} rows  {path or '(not exported)'}")
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Maintain the monthly partitions of audit_logs."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    partitions_cmd = commands.add_parser(
+        "partitions", help="create the monthly partitions ahead of time"
+    )
+    partitions_cmd.add_argument(
+        "--months-ahead", type=int, default=AUDIT_RETENTION_CONFIG["months_ahead"]
+    )
+
+    retain_cmd = commands.add_parser(
+        "retain", help="archive and drop partitions older than the retention window"
+    )
+    retain_cmd.add_argument(
+        "--months",
+        type=int,
+        default=AUDIT_RETENTION_CONFIG["retention_months"],
+        help="whole months to keep in audit_logs",
+    )
+    retain_cmd.add_argument(
+        "--archive-dir", default=AUDIT_RETENTION_CONFIG["archive_dir"]
+    )
+    retain_cmd.add_argument(
+        "--no-archive",
+        action="store_true",
+        help="drop expired partitions without exporting them",
+    )
+
+    commands.add_parser("status", help="list partitions and archives")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        status()
+    else:
+        conn = get_connection()
+        try:
+            if args.command == "partitions":
+                added = ensure_partitions(conn, args.months_ahead)
+                print(f"Added partitions: {', '.join(added) or '(none needed)'}")
+            else:
+                for name, rows, path in retire_partitions(
+                    conn, args.months, args.archive_dir, archive=not args.no_archive
+                ):
+                    print(f"Dropped {name} ({rows:,} rows) -> {path or 'not archived'}")
+        finally:
+            conn.close()
+        print("✅ Done.")
@@ -2,7 +2,7 @@
 
 from functools import wraps
 from flask import session, flash, redirect, url_for
-from auth_helpers import user_has_role, user_has_permission
+from auth_helpers import session_has_role, session_has_permission
 
 
 def login_required(f):
@@ -27,7 +27,7 @@ def role_required(role_name):
             if "user_id" not in session:
                 flash("Please log in to access this page.", "warning")
                 return redirect(url_for("auth.login"))
-            if not user_has_role(session["user_id"], role_name):
+            if not session_has_role(role_name):
                 flash("You do not have permission to access this page.", "error")
                 return redirect(url_for("main.index"))
             return f(*args, **kwargs)
@@ -46,7 +46,7 @@ def permission_required(permission_name):
             if "user_id" not in session:
                 flash("Please log in to access this page.", "warning")
                 return redirect(url_for("auth.login"))
-            if not user_has_permission(session["user_id"], permission_name):
+            if not session_has_permission(permission_name):
                 flash("You do not have permission to access this page.", "error")
                 return redirect(url_for("main.index"))
             return f(*args, **kwargs)
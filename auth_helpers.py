@@ -1,8 +1,69 @@
 """Authentication helper functions."""
 
+import threading
+import time
 from datetime import datetime
-from flask import session
+from flask import session, g, has_request_context, current_app
 from db import get_connection
+from cache_helpers import TTLCache
+from write_behind_helpers import BatchWriter
+
+# Cross-request cache of user -> roles/permissions.
+RBAC_CACHE_CONFIG = {
+    "maxsize": 4096,
+    "ttl": 300,  # Seconds before an entry is reloaded regardless of version
+    "version_check_interval": 5,  # Seconds between reads of the shared version
+}
+
+_rbac_cache = TTLCache(
+    maxsize=RBAC_CACHE_CONFIG["maxsize"], ttl=RBAC_CACHE_CONFIG["ttl"]
+)
+_rbac_version = {"value": None, "checked_at": 0.0}
+_rbac_version_lock = threading.Lock()
+
+# Columns exposed for the logged-in user (never the password hash).
+USER_PROFILE_COLUMNS = "id, username, email, created_at, updated_at"
+
+# Short-lived cross-request cache of user profiles.
+USER_PROFILE_CACHE_CONFIG = {"maxsize": 4096, "ttl": 60}
+
+_user_profile_cache = TTLCache(
+    maxsize=USER_PROFILE_CACHE_CONFIG["maxsize"],
+    ttl=USER_PROFILE_CACHE_CONFIG["ttl"],
+)
+
+# Logins (sessions rows) and last-seen times are written behind the request.
+SESSION_WRITER_CONFIG = {
+    "max_queue": 10000,  # Rows held in memory before add() applies back-pressure
+    "batch_size": 500,  # Rows per multi-row INSERT
+    "flush_interval": 1.0,  # Max seconds a row waits before it is written
+    "put_timeout": 0.05,  # Max seconds a request waits on a full queue
+}
+
+# Seconds between two last-seen writes for the same user (per process)
+LAST_SEEN_INTERVAL = 300
+
+_session_writer = BatchWriter(
+    "sessions",
+    "INSERT INTO sessions (user_id, started_at) VALUES (%s, %s)",
+    **SESSION_WRITER_CONFIG,
+)
+_last_seen_writer = BatchWriter(
+    "last_seen",
+    """
+    INSERT INTO user_last_seen (user_id, last_seen_at) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE last_seen_at = GREATEST(last_seen_at, VALUES(last_seen_at))
+    """,
+    **SESSION_WRITER_CONFIG,
+)
+
+# Users whose last-seen time was queued within the last LAST_SEEN_INTERVAL
+_last_seen_recent = TTLCache(maxsize=100000, ttl=LAST_SEEN_INTERVAL)
+
+# Bit positions used to pack roles/permissions into the signed session cookie.
+# Names missing here are always checked against the database.
+PERMISSION_BITS = {"read": 1, "create": 2, "update": 4, "delete": 8}
+ROLE_BITS = {"user": 1, "admin": 2}
 
 
 def get_user_by_username(username):
@@ -38,43 +99,138 @@ def get_user_by_id(user_id):
     return user
 
 
-def get_user_roles(user_id):
-    """Get all roles for a user."""
+def _load_user_auth(user_id):
+    """Load a user's roles and permissions with a single query."""
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
     cur.execute(
         """
-        SELECT r.id, r.name 
-        FROM roles r
-        INNER JOIN user_roles ur ON r.id = ur.role_id
+        SELECT r.id AS role_id, r.name AS role_name,
+               p.id AS permission_id, p.name AS permission_name
+        FROM user_roles ur
+        INNER JOIN roles r ON r.id = ur.role_id
+        LEFT JOIN role_permissions rp ON rp.role_id = r.id
+        LEFT JOIN permissions p ON p.id = rp.permission_id
         WHERE ur.user_id = %s
         """,
         (user_id,),
     )
-    roles = cur.fetchall()
+    rows = cur.fetchall()
     cur.close()
     conn.close()
-    return roles
 
+    roles = {}
+    permissions = {}
+    for row in rows:
+        roles.setdefault(row["role_id"], {"id": row["role_id"], "name": row["role_name"]})
+        if row["permission_id"] is not None:
+            permissions.setdefault(
+                row["permission_id"],
+                {"id": row["permission_id"], "name": row["permission_name"]},
+            )
+    return {"roles": list(roles.values()), "permissions": list(permissions.values())}
 
-def get_user_permissions(user_id):
-    """Get all permissions for a user (through their roles)."""
+
+def _read_rbac_version():
     conn = get_connection()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor()
+    cur.execute("SELECT version FROM cache_versions WHERE name = 'rbac'")
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+    return row[0] if row else 0
+
+
+def get_rbac_version():
+    """Get the shared RBAC version, re-reading it from the DB at most every few seconds.
+
+    Every role/permission change bumps this counter, so all worker processes
+    notice stale cache entries without reloading each user's roles.
+    """
+    now = time.monotonic()
+    with _rbac_version_lock:
+        fresh = (
+            _rbac_version["value"] is not None
+            and now - _rbac_version["checked_at"]
+            < RBAC_CACHE_CONFIG["version_check_interval"]
+        )
+        if fresh:
+            return _rbac_version["value"]
+    version = _read_rbac_version()
+    with _rbac_version_lock:
+        _rbac_version["value"] = version
+        _rbac_version["checked_at"] = now
+    return version
+
+
+def invalidate_user_auth(user_id=None):
+    """Drop cached roles/permissions for one user (or everyone) in every process.
+
+    Call this after any change to user_roles, roles, role_permissions or
+    permissions.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
     cur.execute(
         """
-        SELECT DISTINCT p.id, p.name
-        FROM permissions p
-        INNER JOIN role_permissions rp ON p.id = rp.permission_id
-        INNER JOIN user_roles ur ON rp.role_id = ur.role_id
-        WHERE ur.user_id = %s
-        """,
-        (user_id,),
+        INSERT INTO cache_versions (name, version) VALUES ('rbac', 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+        """
     )
-    permissions = cur.fetchall()
+    conn.commit()
     cur.close()
     conn.close()
-    return permissions
+
+    if user_id is None:
+        _rbac_cache.clear()
+    else:
+        _rbac_cache.delete(user_id)
+    with _rbac_version_lock:
+        _rbac_version["value"] = None
+    if has_request_context():
+        g.pop("_auth_cache", None)
+
+
+def get_rbac_cache_stats():
+    """Return hit/miss counters for the cross-request RBAC cache."""
+    stats = _rbac_cache.stats()
+    stats["version"] = _rbac_version["value"]
+    return stats
+
+
+def _get_cached_user_auth(user_id):
+    version = get_rbac_version()
+    # An entry from before the last RBAC change counts as a miss
+    entry = _rbac_cache.get(user_id, valid=lambda e: e["version"] == version)
+    if entry is not None:
+        return entry["auth"]
+    auth = _load_user_auth(user_id)
+    _rbac_cache.set(user_id, {"version": version, "auth": auth})
+    return auth
+
+
+def get_user_auth(user_id):
+    """Get a user's roles and permissions.
+
+    Results are memoized for the current request and kept in a
+    cross-request cache validated against the shared RBAC version.
+    """
+    if not has_request_context():
+        return _get_cached_user_auth(user_id)
+    cache = g.setdefault("_auth_cache", {})
+    if user_id not in cache:
+        cache[user_id] = _get_cached_user_auth(user_id)
+    return cache[user_id]
+
+
+def get_user_roles(user_id):
+    """Get all roles for a user."""
+    return get_user_auth(user_id)["roles"]
+
+
+def get_user_permissions(user_id):
+    """Get all permissions for a user (through their roles)."""
+    return get_user_auth(user_id)["permissions"]
 
 
 def user_has_role(user_id, role_name):
@@ -89,23 +245,148 @@ def user_has_permission(user_id, permission_name):
     return any(perm["name"] == permission_name for perm in permissions)
 
 
+def _pack_bits(names, bits):
+    mask = 0
+    for name in names:
+        mask |= bits.get(name, 0)
+    return mask
+
+
+def store_session_auth(user_id):
+    """Write the user's role/permission bitmasks and the RBAC version into the session.
+
+    Does nothing unless the app's SESSION_AUTH option is enabled.
+    """
+    if not current_app.config.get("SESSION_AUTH"):
+        return
+    auth = get_user_auth(user_id)
+    session["perm_mask"] = _pack_bits((p["name"] for p in auth["permissions"]), PERMISSION_BITS)
+    session["role_mask"] = _pack_bits((r["name"] for r in auth["roles"]), ROLE_BITS)
+    session["auth_version"] = get_rbac_version()
+
+
+def _session_auth_is_current():
+    """True if the session's auth stamp is enabled and not older than the RBAC version."""
+    if not current_app.config.get("SESSION_AUTH"):
+        return False
+    stamp = session.get("auth_version")
+    return stamp is not None and stamp >= get_rbac_version()
+
+
+def _session_check(name, bits, mask_key, db_check):
+    bit = bits.get(name)
+    if bit is not None and _session_auth_is_current():
+        return bool(session.get(mask_key, 0) & bit)
+    granted = db_check(session["user_id"], name)
+    store_session_auth(session["user_id"])
+    return granted
+
+
+def session_has_permission(permission_name):
+    """Check a permission for the logged-in user, using the session stamp when current."""
+    return _session_check(
+        permission_name, PERMISSION_BITS, "perm_mask", user_has_permission
+    )
+
+
+def session_has_role(role_name):
+    """Check a role for the logged-in user, using the session stamp when current."""
+    return _session_check(role_name, ROLE_BITS, "role_mask", user_has_role)
+
+
+def get_session_permission_names():
+    """Get the logged-in user's permission names, from the session stamp when current."""
+    if "user_id" not in session:
+        return set()
+    if _session_auth_is_current():
+        mask = session.get("perm_mask", 0)
+        return {name for name, bit in PERMISSION_BITS.items() if mask & bit}
+    names = {perm["name"] for perm in get_user_permissions(session["user_id"])}
+    store_session_auth(session["user_id"])
+    return names
+
+
 def create_session(user_id):
-    """Create a new session for a user."""
+    """Record a login in the sessions table (written in the background)."""
+    now = datetime.now()
+    _session_writer.add((user_id, now))
+    _last_seen_recent.set(user_id, True)
+    _last_seen_writer.add((user_id, now))
+
+
+def touch_last_seen(user_id):
+    """Queue a last-seen update for the user, at most once per LAST_SEEN_INTERVAL."""
+    if _last_seen_recent.get(user_id) is not None:
+        return
+    _last_seen_recent.set(user_id, True)
+    _last_seen_writer.add((user_id, datetime.now()))
+
+
+def get_session_writer_stats():
+    """Return the counters of the background sessions and last-seen writers."""
+    return {
+        "sessions": _session_writer.stats(),
+        "last_seen": _last_seen_writer.stats(),
+    }
+
+
+def init_app(app):
+    """Register the per-request last-seen update on a Flask app."""
+
+    @app.before_request
+    def _touch_last_seen():
+        if "user_id" in session:
+            touch_last_seen(session["user_id"])
+
+
+def _load_user_profile(user_id):
     conn = get_connection()
-    cur = conn.cursor()
+    cur = conn.cursor(dictionary=True)
     cur.execute(
-        "INSERT INTO sessions (user_id, started_at) VALUES (%s, %s)",
-        (user_id, datetime.now()),
+        f"SELECT {USER_PROFILE_COLUMNS} FROM app_users WHERE id = %s", (user_id,)
     )
-    conn.commit()
-    session_id = cur.lastrowid
+    user = cur.fetchone()
     cur.close()
     conn.close()
-    return session_id
+    return user
+
+
+def get_user_profile(user_id):
+    """Get a user's public profile (no password hash).
+
+    Memoized for the current request and cached across requests for a few
+    seconds; call invalidate_user_profile() after changing the user row.
+    """
+    if has_request_context():
+        profiles = g.setdefault("_user_profiles", {})
+        if user_id in profiles:
+            return profiles[user_id]
+
+    user = _user_profile_cache.get(user_id)
+    if user is None:
+        user = _load_user_profile(user_id)
+        if user is not None:
+            _user_profile_cache.set(user_id, user)
+
+    if has_request_context():
+        g._user_profiles[user_id] = user
+    return user
+
+
+def invalidate_user_profile(user_id):
+    """Drop a user's cached profile after their app_users row changes."""
+    _user_profile_cache.delete(user_id)
+    if has_request_context():
+        g.get("_user_profiles", {}).pop(user_id, None)
+
+
+def get_user_profile_cache_stats():
+    """Return hit/miss counters for the user profile cache."""
+    return _user_profile_cache.stats()
 
 
 def get_current_user():
     """Get the current logged-in user from session."""
     if "user_id" in session:
-        return get_user_by_id(session["user_id"])
+        return get_user_profile(session["user_id"])
     return None
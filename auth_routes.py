@@ -1,6 +1,16 @@
 """Authentication routes."""
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import (
+    Blueprint,
+    Response,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    session,
+    flash,
+    stream_with_context,
+)
 from werkzeug.security import generate_password_hash, check_password_hash
 from db import get_connection
 from auth_helpers import (
@@ -10,9 +20,11 @@ from auth_helpers import (
     get_user_permissions,
     get_current_user,
     create_session,
+    store_session_auth,
 )
-from auth_decorators import login_required, permission_required
-from audit_helpers import get_audit_logs
+from auth_decorators import login_required, role_required
+from audit_helpers import audit_csv_chunks, fetch_audit_page, read_audit_filters
+from recommendation_helpers import invalidate_recommendations
 
 # Create a Blueprint for auth routes
 auth_bp = Blueprint("auth", __name__)
@@ -89,6 +101,7 @@ def login():
         # Create session
         session["user_id"] = user["id"]
         session["username"] = user["username"]
+        store_session_auth(user["id"])
         create_session(user["id"])
 
         flash(f"Welcome back, {user['username']}!", "success")
@@ -177,6 +190,7 @@ def manage_preferences():
             )
 
         conn.commit()
+        invalidate_recommendations(user["id"])
         flash("Preferences updated successfully!", "success")
         cur.close()
         conn.close()
@@ -201,14 +215,47 @@ def manage_preferences():
 
 @auth_bp.route("/audit-logs")
 @login_required
-@permission_required("read")
+@role_required("admin")
 def audit_logs():
-    """View audit logs (admin only)."""
+    """
+    View audit logs (admin only), newest first
+    - Keyset pagination on (created_at, id) via ?after= / ?before= and ?page_size=
+    - Optional ?user= (username), ?action= (prefix), ?from= / ?to= (YYYY-MM-DD)
+    """
     user = get_current_user()
     if not user:
         return redirect(url_for("auth.login"))
 
-    # Get audit logs (limit to 200 most recent)
-    logs = get_audit_logs(limit=200)
+    filters = read_audit_filters(request.args)
+    conn = get_connection()
+    cur = conn.cursor(dictionary=True)
+    logs, page = fetch_audit_page(cur, filters, request.args)
+    cur.close()
+    conn.close()
 
-    return render_template("audit_logs.html", logs=logs)
+    return render_template(
+        "audit_logs.html", logs=logs, page=page, filters=request.args
+    )
+
+
+@auth_bp.route("/audit-logs/export.csv")
+@login_required
+@role_required("admin")
+def export_audit_logs():
+    """Stream the audit logs matching the /audit-logs filters as CSV (admin only)."""
+    filters = read_audit_filters(request.args)
+
+    def generate():
+        conn = get_connection()
+        cur = conn.cursor(dictionary=True)
+        try:
+            yield from audit_csv_chunks(cur, filters)
+        finally:
+            cur.close()
+            conn.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=audit_logs.csv"},
+    )
@@ -0,0 +1,305 @@
+"""Precompute "similar items" into the item_similar table.
+
+Every item becomes a sparse feature vector over its genres (item_genres)
+and its creator: the movie's director, the song's artist and album, or the
+book's author. Features are IDF-weighted, so a shared niche genre or
+the same director counts for more than a shared "Drama", and the rows are
+L2-normalized so a sparse matrix product gives cosine similarity.
+
+Similarities are computed in blocks of rows (X[block] @ X.T). Only pairs
+that share at least one feature are ever materialized, and only the top K
+per item are kept. Nothing is compared pairwise in SQL. Ties are broken
+by the neighbor's normalized rating, from the ratings table or else the
+media row's own rating.
+
+The same run stores each genre's best-rated items (genre_top_items), the
+lists /recommendations merges for a user's preferred genres.
+
+Each result is written to a staging table and swapped in with one atomic
+RENAME, so the routes keep serving the old rows while a rebuild runs.
+
+Usage:
+  python build_similarity.py [--top-k N] [--block-size N] [--genre-top-n N]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from search_helpers import SEARCH_SOURCES
+from recommendation_helpers import GENRE_TOP_N
+from similarity_helpers import TOP_K
+from upload_data import get_connection
+
+# Rows of X multiplied against the whole matrix at a time; bounds the
+# memory of each block's (block x items) sparse product.
+BLOCK_SIZE = 2000
+
+# Relative weight of each feature kind before IDF weighting
+FEATURE_WEIGHTS = {"genre": 1.0, "person": 2.0, "album": 1.0}
+
+# Weight of the neighbor's 0..1 rating when ranking; small enough that it
+# only reorders neighbors with (nearly) equal similarity.
+RATING_TIEBREAK = 0.01
+
+# ratings.rating is on a 0..10 scale for every source
+RATINGS_SCALE = 10
+
+INSERT_BATCH = 5000
+
+
+# -----------------------------
+# LOAD
+# -----------------------------
+def query_frame(conn, sql, columns, params=()):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    frame = pd.DataFrame(cur.fetchall(), columns=columns)
+    cur.close()
+    return frame
+
+
+def load_features(conn):
+    """(item_ids, features) where features has columns item_id, kind, value."""
+    items = query_frame(conn, "SELECT id FROM items", ["item_id"])
+
+    parts = [
+        query_frame(
+            conn, "SELECT item_id, genre_id FROM item_genres", ["item_id", "value"]
+        ).assign(kind="genre")
+    ]
+    for media_type, src in SEARCH_SOURCES.items():
+        people = query_frame(
+            conn,
+            f"""
+            SELECT i.id, m.{src["person_fk"]}
+            FROM items i
+            INNER JOIN {src["table"]} m ON m.id = i.ref_id
+            WHERE i.item_type = %s AND m.{src["person_fk"]} IS NOT NULL
+            """,
+            ["item_id", "value"],
+            (media_type,),
+        )
+        # Creators, artists and authors are separate tables: prefix the ids
+        people["value"] = media_type + ":" + people["value"].astype(str)
+        parts.append(people.assign(kind="person"))
+    parts.append(
+        query_frame(
+            conn,
+            """
+            SELECT i.id, s.album_id
+            FROM items i
+            INNER JOIN songs s ON s.id = i.ref_id
+            WHERE i.item_type = 'song' AND s.album_id IS NOT NULL
+            """,
+            ["item_id", "value"],
+        ).assign(kind="album")
+    )
+    features = pd.concat(parts, ignore_index=True)
+    features["value"] = features["value"].astype(str)
+    return items["item_id"].to_numpy(), features
+
+
+def load_quality(conn, item_ids):
+    """Normalized 0..1 rating per item, aligned with item_ids (0 when unrated)."""
+    rated = query_frame(
+        conn,
+        "SELECT item_id, AVG(rating) FROM ratings GROUP BY item_id",
+        ["item_id", "quality"],
+    ).set_index("item_id")["quality"].astype(float) / RATINGS_SCALE
+
+    own = []
+    for media_type, src in SEARCH_SOURCES.items():
+        own.append(
+            query_frame(
+                conn,
+                f"""
+                SELECT i.id, m.{src["rating"]} / {src["rating_scale"]}
+                FROM items i
+                INNER JOIN {src["table"]} m ON m.id = i.ref_id
+                WHERE i.item_type = %s AND m.{src["rating"]} IS NOT NULL
+                """,
+                ["item_id", "quality"],
+                (media_type,),
+            )
+        )
+    own = pd.concat(own).set_index("item_id")["quality"].astype(float)
+
+    quality = rated.combine_first(own).reindex(item_ids).fillna(0.0)
+    return quality.clip(0.0, 1.0).to_numpy()
+
+
+# -----------------------------
+# FEATURES AND NEIGHBORS
+# -----------------------------
+def feature_matrix(item_ids, features):
+    """Sparse (items x features) CSR matrix with IDF-weighted, L2-normalized rows."""
+    row_of = pd.Series(np.arange(len(item_ids)), index=item_ids)
+    features = features[features["item_id"].isin(row_of.index)].drop_duplicates(
+        ["item_id", "kind", "value"]
+    )
+    rows = row_of.loc[features["item_id"]].to_numpy()
+    cols, _ = pd.factorize(features["kind"] + "|" + features["value"])
+    weights = features["kind"].map(FEATURE_WEIGHTS).to_numpy(dtype=np.float64)
+
+    X = sparse.csr_matrix(
+        (weights, (rows, cols)), shape=(len(item_ids), cols.max() + 1 if len(cols) else 0)
+    )
+    doc_freq = np.bincount(cols, minlength=X.shape[1])
+    idf = np.log((1 + len(item_ids)) / (1 + doc_freq)) + 1.0
+    X = X @ sparse.diags(idf)
+
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ X
+
+
+def top_k_neighbors(X, k, quality, block_size=BLOCK_SIZE):
+    """Yield (row, neighbor rows, cosine scores) per item, best first.
+
+    Cosine similarity of each block of rows against all rows is one sparse
+    product; per row, argpartition picks the top k without a full sort.
+    """
+    X = X.tocsr()
+    XT = X.T.tocsc()
+    for start in range(0, X.shape[0], block_size):
+        S = (X[start:start + block_size] @ XT).tocsr()
+        for r in range(S.shape[0]):
+            row = start + r
+            lo, hi = S.indptr[r], S.indptr[r + 1]
+            cols, scores = S.indices[lo:hi], S.data[lo:hi]
+            keep = cols != row
+            cols, scores = cols[keep], scores[keep]
+            if not len(cols):
+                continue
+            rank = scores + RATING_TIEBREAK * quality[cols]
+            if len(cols) > k:
+                top = np.argpartition(-rank, k - 1)[:k]
+            else:
+                top = np.arange(len(cols))
+            top = top[np.argsort(-rank[top], kind="stable")]
+            yield row, cols[top], scores[top]
+
+
+def top_items_per_genre(item_ids, features, quality, n):
+    """Yield (genre_id, rank, item_id, score): each genre's n best-rated items."""
+    genres = features[features["kind"] == "genre"]
+    row_of = pd.Series(np.arange(len(item_ids)), index=item_ids)
+    genres = genres[genres["item_id"].isin(row_of.index)]
+    ranked = pd.DataFrame(
+        {
+            "genre_id": genres["value"].astype(int).to_numpy(),
+            "item_id": genres["item_id"].to_numpy(),
+            "score": quality[row_of.loc[genres["item_id"]].to_numpy()],
+        }
+    ).drop_duplicates(["genre_id", "item_id"])
+    ranked = ranked.sort_values(
+        ["genre_id", "score", "item_id"], ascending=[True, False, True]
+    )
+    ranked["rank"] = ranked.groupby("genre_id").cumcount() + 1
+    ranked = ranked[ranked["rank"] <= n]
+    for genre_id, rank, item_id, score in zip(
+        ranked["genre_id"], ranked["rank"], ranked["item_id"], ranked["score"]
+    ):
+        yield int(genre_id), int(rank), int(item_id), float(score)
+
+
+def neighbor_rows(item_ids, neighbors):
+    """Yield (item_id, rank, similar_item_id, score) rows from top_k_neighbors()."""
+    for row, cols, scores in neighbors:
+        item_id = int(item_ids[row])
+        for rank, (col, score) in enumerate(zip(cols, scores), start=1):
+            yield item_id, rank, int(item_ids[col]), float(score)
+
+
+# -----------------------------
+# STORE
+# -----------------------------
+def swap_in(conn, table, columns, rows):
+    """Fill `table`_new with rows, then swap it in for `table`. Returns rows written."""
+    staging, old = f"{table}_new", f"{table}_old"
+    cur = conn.cursor()
+    cur.execute(f"DROP TABLE IF EXISTS {staging}")
+    cur.execute(f"CREATE TABLE {staging} LIKE {table}")
+
+    sql = f"""
+        INSERT INTO {staging} ({", ".join(columns)})
+        VALUES ({", ".join(["%s"] * len(columns))})
+    """
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            cur.executemany(sql, batch)
+            conn.commit()
+            written += len(batch)
+            batch = []
+    if batch:
+        cur.executemany(sql, batch)
+        conn.commit()
+        written += len(batch)
+
+    cur.execute(f"DROP TABLE IF EXISTS {old}")
+    cur.execute(f"RENAME TABLE {table} TO {old}, {staging} TO {table}")
+    cur.execute(f"DROP TABLE {old}")
+    cur.close()
+    return written
+
+
+def build(top_k=TOP_K, block_size=BLOCK_SIZE, genre_top_n=GENRE_TOP_N):
+    started = time.perf_counter()
+    conn = get_connection()
+    try:
+        item_ids, features = load_features(conn)
+        quality = load_quality(conn, item_ids)
+        X = feature_matrix(item_ids, features)
+        print(f"{X.shape[0]:,} items x {X.shape[1]:,} features ({X.nnz:,} non-zero)")
+
+        written = swap_in(
+            conn,
+            "item_similar",
+            ("item_id", "neighbor_rank", "similar_item_id", "score"),
+            neighbor_rows(item_ids, top_k_neighbors(X, top_k, quality, block_size)),
+        )
+        print(f"Stored {written:,} similar-item rows")
+        written = swap_in(
+            conn,
+            "genre_top_items",
+            ("genre_id", "item_rank", "item_id", "score"),
+            top_items_per_genre(item_ids, features, quality, genre_top_n),
+        )
+        print(f"Stored {written:,} genre top-item rows")
+    finally:
+        conn.close()
+    print(f"Built in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=(
+            "Precompute the top-K similar items of every item (item_similar) "
+            "and the best-rated items of every genre (genre_top_items)."
+        )
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=TOP_K, help="neighbors stored per item"
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=BLOCK_SIZE,
+        help="items scored per sparse matrix product",
+    )
+    parser.add_argument(
+        "--genre-top-n",
+        type=int,
+        default=GENRE_TOP_N,
+        help="items stored per genre for recommendations",
+    )
+    args = parser.parse_args()
+
+    build(args.top_k, args.block_size, args.genre_top_n)
+    print("✅ Done.")
@@ -0,0 +1,502 @@
+"""Set-based bulk loaders for the CSV datasets.
+
+The row-by-row loaders in upload_data.py issue a SELECT, an INSERT and a
+commit per dimension value per row. The loaders here resolve every
+distinct artist/author/creator/genre/album of a chunk in a few batched
+statements, insert facts with executemany (sent as multi-row INSERTs)
+and commit once per chunk. CSVs are streamed chunk by chunk, so memory
+use is bounded by the chunk size rather than the file size.
+
+Run through upload_data.py:  python upload_data.py --bulk
+"""
+import time
+
+import pandas as pd
+
+from checkpoint_helpers import Checkpoint
+from upload_data import (
+    IN_BATCH,
+    chunked,
+    resolve_item_ids,
+    link_item_genres,
+    get_connection,
+    normalize_key,
+    DimensionCache,
+    records,
+    genre_names,
+    prepare_books,
+    prepare_movies,
+    prepare_songs,
+    read_csv_chunks,
+    load_directors,
+    load_book_lookup,
+    memory_summary,
+    STREAM_CHUNK_SIZE,
+    BOOK_COLUMNS,
+    SONG_COLUMNS,
+    MOVIE_COLUMNS,
+    RATING_COLUMNS,
+    UPSERT_RATING_SQL,
+)
+
+CHUNK_SIZE = STREAM_CHUNK_SIZE  # CSV rows per chunk (one commit per chunk)
+
+# Natural keys used to match CSV rows to existing fact/album rows
+BOOK_KEY = ("title", "author_id", "year")
+SONG_KEY = ("title", "artist_id", "album_id")
+MOVIE_KEY = ("title", "year")
+ALBUM_KEY = ("title", "year")
+
+
+class LoadStats:
+    """Row count, throughput and peak memory of one loader run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.cache = None
+
+    def add_chunk(self, rows):
+        self.rows += rows
+        self.chunks += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        text = (
+            f"{self.name}: {self.rows} rows in {self.chunks} chunks, "
+            f"{self.elapsed:.1f}s ({self.rows_per_second:,.0f} rows/s), "
+            f"{memory_summary()}"
+        )
+        if self.cache is not None:
+            text += f"\n  {self.cache.summary()}"
+        return text
+
+
+# -----------------------------
+# SET-BASED RESOLVERS
+# -----------------------------
+def _select_name_ids(cur, table, names):
+    ids = {}
+    for batch in chunked(names, IN_BATCH):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cur.execute(
+            f"SELECT id, name FROM {table} WHERE name IN ({placeholders})", batch
+        )
+        for row_id, name in cur.fetchall():
+            ids.setdefault(normalize_key(name), row_id)
+    return ids
+
+
+def _match_name_ids(cur, table, names):
+    """Ids of `names` as matched by MySQL itself, one lookup per name.
+
+    Used for the few names normalize_key() keys differently from the
+    UNIQUE(name) collation (e.g. "Æ" vs "AE").
+    """
+    ids = {}
+    for name in names:
+        cur.execute(f"SELECT id FROM {table} WHERE name = %s", (name,))
+        row = cur.fetchone()
+        if row is not None:
+            ids[normalize_key(name)] = row[0]
+    return ids
+
+
+def resolve_names(conn, table, names, cache=None):
+    """Map each distinct name to its id in a name-keyed dimension table.
+
+    Names found in `cache` (a DimensionCache) skip the database. The rest
+    are fetched with batched IN (...) lookups; missing ones are added with
+    one multi-row INSERT IGNORE (the name column is UNIQUE) and fetched
+    again. Raises RuntimeError if a name still has no id, rather than
+    leaving its foreign keys NULL.
+    """
+    names = list(dict.fromkeys(n for n in names if n))
+    resolved = {}
+    if cache is not None:
+        for name in names:
+            cached_id = cache.get(table, name)
+            if cached_id is not None:
+                resolved[name] = cached_id
+        names = [n for n in names if n not in resolved]
+    if not names:
+        return resolved
+
+    cur = conn.cursor()
+    ids = _select_name_ids(cur, table, names)
+    missing = [n for n in names if normalize_key(n) not in ids]
+    if missing:
+        cur.executemany(
+            f"INSERT IGNORE INTO {table} (name) VALUES (%s)", [(n,) for n in missing]
+        )
+        ids.update(_select_name_ids(cur, table, missing))
+        # An ignored INSERT means the collation matched an existing name
+        # that normalize_key() keys differently
+        ids.update(
+            _match_name_ids(cur, table, [n for n in missing if normalize_key(n) not in ids])
+        )
+    cur.close()
+
+    unresolved = [n for n in names if normalize_key(n) not in ids]
+    if unresolved:
+        raise RuntimeError(
+            f"Could not resolve {len(unresolved)} {table} names, e.g. {unresolved[:5]}"
+        )
+    for name in names:
+        row_id = ids[normalize_key(name)]
+        resolved[name] = row_id
+        if cache is not None:
+            cache.add(table, name, row_id)
+    return resolved
+
+
+def row_key(row, key_columns):
+    """Key of `row` as used in the dict returned by resolve_rows()."""
+    return tuple(normalize_key(row[c]) for c in key_columns)
+
+
+def _select_row_ids(cur, table, key_columns, keys):
+    """Fetch ids for the given keys, looked up by the first key column."""
+    ids = {}
+    first_values = list(dict.fromkeys(k[0] for k in keys))
+    columns = ", ".join(key_columns)
+    for batch in chunked(first_values, IN_BATCH):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cur.execute(
+            f"SELECT id, {columns} FROM {table} WHERE {key_columns[0]} IN ({placeholders})",
+            batch,
+        )
+        for row in cur.fetchall():
+            key = tuple(normalize_key(v) for v in row[1:])
+            ids.setdefault(key, row[0])
+    return ids
+
+
+def resolve_rows(conn, table, key_columns, rows):
+    """Map each row's key to its id in `table`, inserting rows whose key is missing.
+
+    `rows` are dicts holding the key columns plus any other columns to
+    insert. Candidates are fetched by the first key column and the full key
+    is matched in Python, which also handles NULL key parts. Returns
+    {normalized key tuple: id}; use row_key() to look rows up.
+    """
+    by_key = {}
+    for row in rows:
+        by_key.setdefault(row_key(row, key_columns), row)
+    if not by_key:
+        return {}
+
+    cur = conn.cursor()
+    ids = _select_row_ids(cur, table, key_columns, list(by_key))
+    missing = [row for key, row in by_key.items() if key not in ids]
+    if missing:
+        columns = list(missing[0])
+        placeholders = ", ".join(["%s"] * len(columns))
+        cur.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            [tuple(row[c] for c in columns) for row in missing],
+        )
+        ids.update(
+            _select_row_ids(
+                cur, table, key_columns, [row_key(r, key_columns) for r in missing]
+            )
+        )
+    cur.close()
+    return ids
+
+
+def resolve_albums(conn, albums, cache=None):
+    """Map (title, year) pairs to album ids, using `cache` before the database."""
+    keys = list(dict.fromkeys(albums))
+    resolved = {}
+    if cache is not None:
+        for key in keys:
+            cached_id = cache.get("albums", key)
+            if cached_id is not None:
+                resolved[key] = cached_id
+        keys = [k for k in keys if k not in resolved]
+
+    rows = [{"title": title, "year": year} for title, year in keys]
+    ids = resolve_rows(conn, "albums", ALBUM_KEY, rows)
+    for key, row in zip(keys, rows):
+        row_id = ids[row_key(row, ALBUM_KEY)]
+        resolved[key] = row_id
+        if cache is not None:
+            cache.add("albums", key, row_id)
+    return resolved
+
+
+def resolve_items(conn, item_type, ref_ids):
+    """Map ref_id -> items.id for one item type, creating missing items rows."""
+    ids = resolve_item_ids(conn, [(item_type, r) for r in ref_ids])
+    return {ref_id: item_id for (_, ref_id), item_id in ids.items()}
+
+
+def insert_ratings(conn, rows):
+    """Upsert (item_id, source, source_key, rating) rows with one executemany."""
+    if not rows:
+        return
+    cur = conn.cursor()
+    cur.executemany(UPSERT_RATING_SQL, rows)
+    cur.close()
+
+
+# -----------------------------
+# CHUNK PARSERS AND WRITERS
+# -----------------------------
+# Each dataset is split into a parse step (pure pandas, safe to run in
+# another process) and a write step (DB work for one chunk, no commit).
+def write_book_chunk(conn, chunk, cache):
+    """Authors, books and items for a chunk of prepare_books() rows.
+
+    Returns (book rows with their ids, {book id: item id}).
+    """
+    parsed = records(chunk[["title", "author", "year"]])
+    author_ids = resolve_names(conn, "authors", chunk["author"], cache)
+    books = [
+        {
+            "title": p["title"],
+            "author_id": author_ids.get(p["author"]),
+            "year": p["year"],
+            "avg_rating": None,
+        }
+        for p in parsed
+    ]
+    book_ids = resolve_rows(conn, "books", BOOK_KEY, books)
+    for book in books:
+        book["id"] = book_ids[row_key(book, BOOK_KEY)]
+    item_ids = resolve_items(conn, "book", [b["id"] for b in books])
+    return books, item_ids
+
+
+def write_song_chunk(conn, chunk, cache):
+    """Artists, albums, songs, items and genre links for prepare_songs() rows.
+
+    Returns the item id of every row.
+    """
+    parsed = records(chunk)
+    artist_ids = resolve_names(conn, "artists", chunk["artist"], cache)
+    album_ids = resolve_albums(conn, [(a, None) for a in chunk["album"]], cache)
+
+    songs = [
+        {
+            "title": p["title"],
+            "artist_id": artist_ids.get(p["artist"]),
+            "album_id": album_ids[(p["album"], None)],
+            "spotify_popularity": p["popularity"],
+            "year": None,
+        }
+        for p in parsed
+    ]
+    song_ids = resolve_rows(conn, "songs", SONG_KEY, songs)
+    ref_ids = [song_ids[row_key(s, SONG_KEY)] for s in songs]
+    item_ids = resolve_items(conn, "song", ref_ids)
+
+    genre_ids = resolve_names(conn, "genres", chunk["genre"].dropna(), cache)
+    link_item_genres(
+        conn,
+        [
+            (item_ids[ref_id], genre_ids[p["genre"]])
+            for ref_id, p in zip(ref_ids, parsed)
+            if p["genre"]
+        ],
+    )
+    return [item_ids[ref_id] for ref_id in ref_ids]
+
+
+def parse_movie_chunk(chunk, directors):
+    """prepare_movies() rows of a raw movies chunk plus a `genres` list column."""
+    movies = prepare_movies(chunk, directors)
+    movies["genres"] = (
+        genre_names(chunk["genres"]).groupby(level=0).agg(list).reindex(movies.index)
+    )
+    return movies
+
+
+def write_movie_chunk(conn, chunk, cache):
+    """Directors, movies, items, genre links and TMDB ratings for parse_movie_chunk() rows.
+
+    Returns the item id of every row.
+    """
+    parsed = records(chunk)
+    for p in parsed:
+        p["genres"] = p["genres"] or []
+
+    director_ids = resolve_names(
+        conn, "creators", [p["director"] for p in parsed], cache
+    )
+    movies = [
+        {
+            "title": p["title"],
+            "year": p["year"],
+            "imdb_rating": p["vote_avg"],
+            "director_id": director_ids.get(p["director"]),
+        }
+        for p in parsed
+    ]
+    movie_ids = resolve_rows(conn, "movies", MOVIE_KEY, movies)
+    ref_ids = [movie_ids[row_key(m, MOVIE_KEY)] for m in movies]
+    item_ids = resolve_items(conn, "movie", ref_ids)
+
+    genre_ids = resolve_names(
+        conn, "genres", [g for p in parsed for g in p["genres"]], cache
+    )
+    link_item_genres(
+        conn,
+        [
+            (item_ids[ref_id], genre_ids[g])
+            for ref_id, p in zip(ref_ids, parsed)
+            for g in p["genres"]
+            if g
+        ],
+    )
+    insert_ratings(
+        conn,
+        [
+            (item_ids[ref_id], "tmdb_vote_average", "", p["vote_avg"])
+            for ref_id, p in zip(ref_ids, parsed)
+            if p["vote_avg"] is not None
+        ],
+    )
+    return [item_ids[ref_id] for ref_id in ref_ids]
+
+
+def parse_rating_chunk(chunk):
+    """Ratings.csv rows with a numeric Book-Rating (unparseable ratings dropped)."""
+    chunk = chunk.assign(
+        **{"Book-Rating": pd.to_numeric(chunk["Book-Rating"], errors="coerce")}
+    )
+    return chunk.dropna(subset=["ISBN", "Book-Rating"])
+
+
+def join_ratings(chunk, books):
+    """parse_rating_chunk() rows joined to the load_book_lookup() frame on ISBN."""
+    return chunk.merge(books, left_on="ISBN", right_index=True, how="inner")
+
+
+def write_rating_chunk(conn, chunk, cache):
+    """Books, items and upserted ratings (keyed by User-ID) for join_ratings() rows."""
+    rated_books, item_ids = write_book_chunk(conn, chunk, cache)
+    insert_ratings(
+        conn,
+        [
+            (item_ids[b["id"]], "book_ratings_csv", str(u), float(r))
+            for b, u, r in zip(rated_books, chunk["User-ID"], chunk["Book-Rating"])
+        ],
+    )
+
+
+# -----------------------------
+# BULK LOADERS
+# -----------------------------
+def load_dataset(name, paths, chunks, write, chunk_size, limit=None, resume=False):
+    """Write the chunks of one dataset, committing once per chunk.
+
+    `chunks(skip, limit)` yields (CSV rows, parsed chunk) pairs starting
+    after `skip` data rows; `write(conn, chunk, cache)` does the DB work.
+    With resume=True progress is checkpointed with every commit: a rerun
+    continues after the last committed chunk, and returns at once if
+    `paths` are unchanged since a complete load.
+    """
+    conn = get_connection()
+    stats = LoadStats(name)
+    checkpoint = None
+    skip = 0
+    if resume:
+        checkpoint = Checkpoint(conn, name, paths, chunk_size, limit)
+        print(checkpoint.describe())
+        if checkpoint.completed:
+            conn.close()
+            return stats
+        skip, limit = checkpoint.skip_rows, checkpoint.remaining_limit
+
+    cache = stats.cache = DimensionCache(conn)
+    for rows, chunk in chunks(skip, limit):
+        write(conn, chunk, cache)
+        if checkpoint is not None:
+            checkpoint.commit(conn, rows)
+        else:
+            conn.commit()
+        stats.add_chunk(rows)
+    if checkpoint is not None:
+        checkpoint.finish(conn)
+
+    conn.close()
+    print(stats.summary())
+    return stats
+
+
+def bulk_load_books(books_csv, limit=None, chunk_size=CHUNK_SIZE, resume=False):
+    def chunks(skip, limit):
+        for chunk in read_csv_chunks(
+            books_csv, BOOK_COLUMNS, chunk_size, limit, skip, dtype={"ISBN": str}
+        ):
+            yield len(chunk), prepare_books(chunk)
+
+    return load_dataset(
+        "books", [books_csv], chunks, write_book_chunk, chunk_size, limit, resume
+    )
+
+
+def bulk_load_songs(song_csv, limit=None, chunk_size=CHUNK_SIZE, resume=False):
+    def chunks(skip, limit):
+        for chunk in read_csv_chunks(song_csv, SONG_COLUMNS, chunk_size, limit, skip):
+            yield len(chunk), prepare_songs(chunk)
+
+    return load_dataset(
+        "songs", [song_csv], chunks, write_song_chunk, chunk_size, limit, resume
+    )
+
+
+def bulk_load_movies(
+    movies_csv, credits_csv, limit=None, chunk_size=CHUNK_SIZE, resume=False
+):
+    def chunks(skip, limit):
+        directors = load_directors(credits_csv, chunk_size)
+        for chunk in read_csv_chunks(
+            movies_csv, MOVIE_COLUMNS, chunk_size, limit, skip
+        ):
+            # Parse every column once, vectorized, before any DB work
+            yield len(chunk), parse_movie_chunk(chunk, directors)
+
+    return load_dataset(
+        "movies",
+        [movies_csv, credits_csv],
+        chunks,
+        write_movie_chunk,
+        chunk_size,
+        limit,
+        resume,
+    )
+
+
+def bulk_load_book_ratings(
+    ratings_csv, books_csv, limit=None, chunk_size=CHUNK_SIZE, resume=False
+):
+    """Ratings.csv streamed in chunks, each joined to Books.csv on ISBN and loaded."""
+
+    def chunks(skip, limit):
+        books = load_book_lookup(books_csv, chunk_size)
+        for chunk in read_csv_chunks(
+            ratings_csv, RATING_COLUMNS, chunk_size, limit, skip, dtype={"ISBN": str}
+        ):
+            yield len(chunk), join_ratings(parse_rating_chunk(chunk), books)
+
+    return load_dataset(
+        "book ratings",
+        [ratings_csv, books_csv],
+        chunks,
+        write_rating_chunk,
+        chunk_size,
+        limit,
+        resume,
+    )
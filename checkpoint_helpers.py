@@ -0,0 +1,118 @@
+"""Checkpoints for resumable CSV ingestion (the ingest_checkpoints table)."""
+
+import hashlib
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(*paths):
+    """SHA-256 over the contents of one or more files, read in blocks."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Progress of one loader source, stored in ingest_checkpoints.
+
+    A checkpoint only applies to the same input: if the files' content
+    hash, the chunk size or the row limit changed, the load starts over.
+    commit() writes the position in the same transaction as the chunk it
+    records, so after a crash the stored position is exactly the last
+    committed chunk.
+    """
+
+    def __init__(self, conn, source, paths, chunk_size, limit=None):
+        self.source = source
+        self.file_hash = file_hash(*paths)
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self.chunks_done = 0
+        self.rows_done = 0
+        self.completed = False
+
+        cur = conn.cursor(dictionary=True)
+        cur.execute(
+            """
+            SELECT file_hash, chunk_size, row_limit, chunks_done, rows_done, completed
+            FROM ingest_checkpoints
+            WHERE source = %s
+            """,
+            (source,),
+        )
+        row = cur.fetchone()
+        cur.close()
+        if (
+            row
+            and row["file_hash"] == self.file_hash
+            and row["chunk_size"] == chunk_size
+            and row["row_limit"] == limit
+        ):
+            self.chunks_done = row["chunks_done"]
+            self.rows_done = row["rows_done"]
+            self.completed = bool(row["completed"])
+
+    @property
+    def skip_rows(self):
+        """CSV data rows already loaded (to skip when reading)."""
+        return self.chunks_done * self.chunk_size
+
+    @property
+    def remaining_limit(self):
+        """Row limit for the rest of the file, or None for no limit."""
+        if self.limit is None:
+            return None
+        return max(self.limit - self.skip_rows, 0)
+
+    def _save(self, conn, chunks_done, rows_done, completed):
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO ingest_checkpoints
+                (source, file_hash, chunk_size, row_limit, chunks_done, rows_done, completed)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                file_hash = VALUES(file_hash),
+                chunk_size = VALUES(chunk_size),
+                row_limit = VALUES(row_limit),
+                chunks_done = VALUES(chunks_done),
+                rows_done = VALUES(rows_done),
+                completed = VALUES(completed)
+            """,
+            (
+                self.source,
+                self.file_hash,
+                self.chunk_size,
+                self.limit,
+                chunks_done,
+                rows_done,
+                completed,
+            ),
+        )
+        cur.close()
+
+    def commit(self, conn, rows):
+        """Record one more loaded chunk in the chunk's own transaction, then commit."""
+        self._save(conn, self.chunks_done + 1, self.rows_done + rows, False)
+        conn.commit()
+        self.chunks_done += 1
+        self.rows_done += rows
+
+    def finish(self, conn):
+        """Mark the source fully loaded and commit."""
+        self._save(conn, self.chunks_done, self.rows_done, True)
+        conn.commit()
+        self.completed = True
+
+    def describe(self):
+        if self.completed:
+            return f"{self.source}: unchanged since last complete load, skipped"
+        if self.chunks_done:
+            return (
+                f"{self.source}: resuming after chunk {self.chunks_done} "
+                f"({self.rows_done:,} rows already loaded)"
+            )
+        return f"{self.source}: starting from the beginning"
@@ -0,0 +1,74 @@
+"""Side-by-side comparison of items (movies, songs and books)."""
+
+from cache_helpers import TTLCache
+from item_helpers import fetch_items, fetch_item_genres, fetch_item_ratings
+
+# Most items accepted in one comparison
+MAX_COMPARE_ITEMS = 10
+
+# Comparison payloads keyed on the set of item ids
+COMPARE_CACHE_CONFIG = {"maxsize": 1024, "ttl": 300}
+
+_compare_cache = TTLCache(
+    maxsize=COMPARE_CACHE_CONFIG["maxsize"], ttl=COMPARE_CACHE_CONFIG["ttl"]
+)
+
+
+def parse_item_ids(values):
+    """Item ids from ?items=1,2,3 (or repeated ?items=), deduplicated, in order.
+
+    Parts that are not plain ASCII digits (e.g. "abc", "-1", "²") are ignored.
+    """
+    ids = []
+    for value in values:
+        for part in value.split(","):
+            part = part.strip()
+            if part.isascii() and part.isdecimal():
+                ids.append(int(part))
+    return list(dict.fromkeys(ids))
+
+
+def summarize_ratings(ratings):
+    """[{source, count, average}, ...] over an item's rating rows."""
+    by_source = {}
+    for r in ratings:
+        if r["rating"] is not None:
+            by_source.setdefault(r["source"], []).append(float(r["rating"]))
+    return [
+        {
+            "source": source,
+            "count": len(values),
+            "average": round(sum(values) / len(values), 2),
+        }
+        for source, values in sorted(by_source.items())
+    ]
+
+
+def build_comparison(cur, item_ids):
+    """{item_id: item} with metadata, creator, genres and every ratings row.
+
+    A fixed number of queries however many items are compared: items,
+    one per media type, genres and ratings.
+    """
+    items = fetch_items(cur, item_ids)
+    genres = fetch_item_genres(cur, list(items))
+    ratings = fetch_item_ratings(cur, list(items))
+    for item_id, item in items.items():
+        item["genres"] = genres[item_id]
+        item["ratings"] = ratings[item_id]
+        item["rating_summary"] = summarize_ratings(ratings[item_id])
+    return items
+
+
+def get_comparison(cur, item_ids):
+    """Compared items in the requested order, from the cache when possible.
+
+    The cache key is the set of ids, so ?items=1,2 and ?items=2,1 share
+    one entry. Ids that do not exist are left out.
+    """
+    key = tuple(sorted(item_ids))
+    items = _compare_cache.get(key)
+    if items is None:
+        items = build_comparison(cur, item_ids)
+        _compare_cache.set(key, items)
+    return [items[item_id] for item_id in item_ids if item_id in items]
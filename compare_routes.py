@@ -0,0 +1,34 @@
+"""Comparison routes (items side by side)."""
+
+from flask import Blueprint, render_template, request, flash
+from db import get_connection
+from auth_decorators import permission_required
+from compare_helpers import MAX_COMPARE_ITEMS, get_comparison, parse_item_ids
+
+# Create a Blueprint for comparison routes
+compare_bp = Blueprint("compare", __name__)
+
+
+@compare_bp.route("/compare")
+@permission_required("read")
+def compare():
+    """
+    Compare movies, songs and books side by side
+    - ?items=1,2,3 item ids (from the items table), up to MAX_COMPARE_ITEMS
+    - Metadata, creator, genres and all ratings rows of each item
+    - Cached on the set of item ids
+    """
+    item_ids = parse_item_ids(request.args.getlist("items"))
+    if len(item_ids) > MAX_COMPARE_ITEMS:
+        flash(f"Only the first {MAX_COMPARE_ITEMS} items are compared.", "warning")
+        item_ids = item_ids[:MAX_COMPARE_ITEMS]
+
+    items = []
+    if item_ids:
+        conn = get_connection()
+        cur = conn.cursor(dictionary=True)
+        items = get_comparison(cur, item_ids)
+        cur.close()
+        conn.close()
+
+    return render_template("compare.html", items=items)
@@ -1,6 +1,11 @@
 """Database connection and configuration."""
 
+import threading
+import time
+from queue import Empty, LifoQueue
+
 import mysql.connector
+from flask import g, has_request_context
 
 DB_CONFIG = {
     "host": "localhost",
@@ -9,7 +14,250 @@ DB_CONFIG = {
     "database": "team_project",
 }
 
+# Process-wide connection pool settings.
+POOL_CONFIG = {
+    "enabled": True,
+    "size": 10,  # Max open connections per process
+    "timeout": 5,  # Seconds to wait for a free connection before failing
+    "recycle": 1800,  # Reopen connections older than this many seconds
+    "ping_interval": 30,  # Ping idle connections unused for longer than this
+}
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class PooledConnection:
+    """Wrapper around a MySQL connection that returns to the pool on close()."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        """Give the connection back to the pool instead of disconnecting."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Fixed-size pool of MySQL connections shared by every caller in the process."""
+
+    def __init__(self, db_config, size=10, timeout=5, recycle=1800, ping_interval=30):
+        self.db_config = db_config
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._created_at = {}
+        self._last_used = {}
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "timeouts": 0,
+        }
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.db_config)
+        now = time.monotonic()
+        with self._lock:
+            self._created_at[id(raw)] = now
+            self._last_used[id(raw)] = now
+            self._stats["created"] += 1
+        return raw
+
+    def _discard(self, raw):
+        with self._lock:
+            self._created_at.pop(id(raw), None)
+            self._last_used.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, raw):
+        """Health check: recycle old connections and ping ones idle for a while."""
+        now = time.monotonic()
+        created = self._created_at.get(id(raw), 0)
+        if self.recycle and now - created > self.recycle:
+            with self._lock:
+                self._stats["recycled"] += 1
+            return False
+
+        last_used = self._last_used.get(id(raw), 0)
+        if now - last_used < self.ping_interval:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._lock:
+                self._stats["failed_health_checks"] += 1
+            return False
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for a free slot."""
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool size {self.size})."
+            )
+
+        try:
+            raw = None
+            while raw is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except Empty:
+                    raw = self._connect()
+                    break
+                if self._is_usable(candidate):
+                    raw = candidate
+                else:
+                    self._discard(candidate)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a raw connection to the idle set, discarding it if it is broken."""
+        try:
+            # Never hand an open transaction to the next caller
+            raw.rollback()
+            with self._lock:
+                self._last_used[id(raw)] = time.monotonic()
+            self._idle.put(raw)
+        except Exception:
+            self._discard(raw)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """Return a snapshot of pool usage counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = len(self._created_at)
+        stats["idle"] = self._idle.qsize()
+        stats["in_use"] = stats["open"] - stats["idle"]
+        stats["size"] = self.size
+        return stats
+
+    def close_all(self):
+        """Disconnect every idle connection (in-use ones close when released)."""
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(raw)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DB_CONFIG,
+                    size=POOL_CONFIG["size"],
+                    timeout=POOL_CONFIG["timeout"],
+                    recycle=POOL_CONFIG["recycle"],
+                    ping_interval=POOL_CONFIG["ping_interval"],
+                )
+    return _pool
+
+
+def get_pool_stats():
+    """Return connection pool statistics (empty if pooling is disabled)."""
+    if not POOL_CONFIG["enabled"] or _pool is None:
+        return {}
+    return _pool.stats()
+
+
+class RequestConnection:
+    """Connection shared by every caller on one Flask request.
+
+    close() is a no-op so helpers keep their usual open/close pattern; the
+    underlying connection is released once, when the request is torn down.
+    Cursors are buffered so several helpers can interleave queries safely.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault("buffered", True)
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        pass
+
+    def release(self):
+        self._conn.close()
+
+
+def _open_connection():
+    if not POOL_CONFIG["enabled"]:
+        return mysql.connector.connect(**DB_CONFIG)
+    return get_pool().acquire()
+
 
 def get_connection():
-    """Get a database connection."""
-    return mysql.connector.connect(**DB_CONFIG)
+    """Get a database connection.
+
+    Inside a Flask request every call returns the same request-scoped
+    connection. Elsewhere (scripts, CLI tools) a pooled connection is
+    checked out; close() returns it to the pool.
+    """
+    if not has_request_context():
+        return _open_connection()
+    conn = g.get("_db_conn")
+    if conn is None:
+        conn = RequestConnection(_open_connection())
+        g._db_conn = conn
+    return conn
+
+
+def close_request_connection(exc=None):
+    """Release the request-scoped connection (registered as a teardown hook)."""
+    conn = g.pop("_db_conn", None)
+    if conn is not None:
+        conn.release()
+
+
+def init_app(app):
+    """Register the request-scoped connection teardown on a Flask app."""
+    app.teardown_appcontext(close_request_connection)
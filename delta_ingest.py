@@ -0,0 +1,431 @@
+"""Incremental (delta) loads for refreshed source CSVs.
+
+Every source row loaded through here is recorded in item_sources under
+its natural key (TMDB id, ISBN, Spotify track_id + genre) together with
+a hash of the columns we load from it. A delta run hashes the refreshed
+CSV, diffs it against that snapshot and applies only the inserted,
+changed and removed rows to the fact tables, items, item_genres and
+ratings; unchanged rows cost nothing but the hash.
+
+The first run for a source has no snapshot yet: every row counts as an
+insert and is matched to the rows upload_data.py already loaded.
+Run it on complete files only: keys missing from the CSV are deleted.
+
+Usage:
+  python delta_ingest.py [movies] [songs] [books] [--dry-run] [--chunk-size N]
+"""
+import argparse
+
+import pandas as pd
+
+from upload_data import (
+    get_connection,
+    DimensionCache,
+    records,
+    read_csv_chunks,
+    prepare_books,
+    prepare_songs,
+    load_directors,
+    STREAM_CHUNK_SIZE,
+    BOOK_COLUMNS,
+    SONG_COLUMNS,
+    MOVIE_COLUMNS,
+)
+from bulk_ingest import (
+    IN_BATCH,
+    chunked,
+    resolve_names,
+    resolve_albums,
+    link_item_genres,
+    insert_ratings,
+    parse_movie_chunk,
+    write_book_chunk,
+    write_song_chunk,
+    write_movie_chunk,
+)
+
+# Update these paths to where your CSVs actually are:
+CSV_PATHS = {
+    "movies": ["csvs/tmdb_5000_movies.csv", "csvs/tmdb_5000_credits.csv"],
+    "songs": ["csvs/song.csv"],
+    "books": ["csvs/Books.csv"],
+}
+
+
+# -----------------------------
+# READING AND HASHING
+# -----------------------------
+def read_movies(paths, chunk_size):
+    movies_csv, credits_csv = paths
+    directors = load_directors(credits_csv, chunk_size)
+    for chunk in read_csv_chunks(movies_csv, MOVIE_COLUMNS, chunk_size):
+        movies = parse_movie_chunk(chunk, directors)
+        movies["genres"] = movies["genres"].map(
+            lambda g: g if isinstance(g, list) else []
+        )
+        movies["key"] = (
+            pd.to_numeric(chunk["id"], errors="coerce").astype("Int64").astype("string")
+        )
+        yield movies[movies["key"].notna()]
+
+
+def read_songs(paths, chunk_size):
+    # One Spotify track is listed once per genre: each (track, genre) row
+    # is its own source row, contributing the song and one genre link.
+    (song_csv,) = paths
+    for chunk in read_csv_chunks(song_csv, SONG_COLUMNS + ("track_id",), chunk_size):
+        if "track_id" not in chunk.columns:
+            raise ValueError(f"{song_csv} has no track_id column to diff on")
+        songs = prepare_songs(chunk)
+        track_ids = chunk["track_id"].astype("string")
+        songs["key"] = track_ids + "|" + songs["genre"].fillna("")
+        yield songs[track_ids.notna()]
+
+
+def read_books(paths, chunk_size):
+    (books_csv,) = paths
+    chunks = read_csv_chunks(books_csv, BOOK_COLUMNS, chunk_size, dtype={"ISBN": str})
+    for chunk in chunks:
+        books = prepare_books(chunk)
+        books["key"] = books["isbn"]
+        yield books
+
+
+def row_hashes(frame, columns):
+    """64-bit hash of each row's `columns` (list cells are hashed joined)."""
+    values = frame[list(columns)].copy()
+    for col in values.columns:
+        if values[col].dtype == object:
+            values[col] = values[col].map(
+                lambda v: "|".join(v) if isinstance(v, list) else v
+            )
+    values = values.astype("string").fillna("\0")
+    return pd.util.hash_pandas_object(values, index=False)
+
+
+# -----------------------------
+# SNAPSHOT (item_sources)
+# -----------------------------
+def load_snapshot(conn, source):
+    """{natural_key: (item_id, row_hash)} of the previous load of `source`."""
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT natural_key, item_id, row_hash FROM item_sources WHERE source = %s",
+        (source,),
+    )
+    snapshot = {key: (item_id, int(row_hash)) for key, item_id, row_hash in cur.fetchall()}
+    cur.close()
+    return snapshot
+
+
+def save_snapshot(conn, source, rows):
+    """Upsert (natural_key, item_id, row_hash) rows of `source`."""
+    if not rows:
+        return
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        INSERT INTO item_sources (source, natural_key, item_id, row_hash)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE item_id = VALUES(item_id), row_hash = VALUES(row_hash)
+        """,
+        [(source, key, int(item_id), int(row_hash)) for key, item_id, row_hash in rows],
+    )
+    cur.close()
+
+
+def _in_list(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def select_ref_ids(conn, item_ids):
+    """{item id: ref_id} for the items that still exist."""
+    refs = {}
+    cur = conn.cursor()
+    for batch in chunked(item_ids, IN_BATCH):
+        cur.execute(f"SELECT id, ref_id FROM items WHERE id IN ({_in_list(batch)})", batch)
+        refs.update(cur.fetchall())
+    cur.close()
+    return refs
+
+
+def delete_items(conn, table, item_ids):
+    """Delete items with their ratings, genre links, neighbors and genre top-list
+    entries, and their `table` rows.
+    """
+    refs = select_ref_ids(conn, list(item_ids))
+    cur = conn.cursor()
+    for batch in chunked(list(refs), IN_BATCH):
+        # genre_top_items has no item_id index, but it only holds GENRE_TOP_N
+        # rows per genre; removed entries just leave a gap in item_rank
+        for child in ("ratings", "item_genres", "item_similar", "genre_top_items"):
+            cur.execute(f"DELETE FROM {child} WHERE item_id IN ({_in_list(batch)})", batch)
+        cur.execute(
+            f"DELETE FROM item_similar WHERE similar_item_id IN ({_in_list(batch)})", batch
+        )
+        cur.execute(f"DELETE FROM items WHERE id IN ({_in_list(batch)})", batch)
+        ref_batch = [refs[item_id] for item_id in batch]
+        cur.execute(f"DELETE FROM {table} WHERE id IN ({_in_list(ref_batch)})", ref_batch)
+    cur.close()
+
+
+def replace_item_genres(conn, item_genres, cache):
+    """Make each item's genre links exactly the given [(item_id, [names])]."""
+    cur = conn.cursor()
+    item_ids = [item_id for item_id, _ in item_genres]
+    for batch in chunked(item_ids, IN_BATCH):
+        cur.execute(f"DELETE FROM item_genres WHERE item_id IN ({_in_list(batch)})", batch)
+    cur.close()
+    genre_ids = resolve_names(
+        conn, "genres", [g for _, names in item_genres for g in names], cache
+    )
+    link_item_genres(
+        conn,
+        [
+            (item_id, genre_ids[g])
+            for item_id, names in item_genres
+            for g in names
+            if g
+        ],
+    )
+
+
+# -----------------------------
+# PER-SOURCE INSERT / UPDATE / UNLINK
+# -----------------------------
+def insert_books(conn, batch, cache):
+    books, item_ids = write_book_chunk(conn, batch, cache)
+    return [item_ids[b["id"]] for b in books]
+
+
+def update_movies(conn, batch, cache):
+    rows = records(batch)
+    director_ids = resolve_names(conn, "creators", [r["director"] for r in rows], cache)
+    cur = conn.cursor()
+    cur.executemany(
+        "UPDATE movies SET title = %s, year = %s, imdb_rating = %s, director_id = %s "
+        "WHERE id = %s",
+        [
+            (r["title"], r["year"], r["vote_avg"], director_ids.get(r["director"]), r["ref_id"])
+            for r in rows
+        ],
+    )
+    cur.executemany(
+        "DELETE FROM ratings WHERE item_id = %s AND source = 'tmdb_vote_average'",
+        [(r["item_id"],) for r in rows if r["vote_avg"] is None],
+    )
+    cur.close()
+    insert_ratings(
+        conn,
+        [
+            (r["item_id"], "tmdb_vote_average", "", r["vote_avg"])
+            for r in rows
+            if r["vote_avg"] is not None
+        ],
+    )
+    replace_item_genres(conn, [(r["item_id"], r["genres"]) for r in rows], cache)
+
+
+def update_songs(conn, batch, cache):
+    # The genre is part of the key, so only the song's own columns can change
+    rows = records(batch)
+    artist_ids = resolve_names(conn, "artists", [r["artist"] for r in rows], cache)
+    album_ids = resolve_albums(conn, [(r["album"], None) for r in rows], cache)
+    cur = conn.cursor()
+    cur.executemany(
+        "UPDATE songs SET title = %s, artist_id = %s, album_id = %s, "
+        "spotify_popularity = %s WHERE id = %s",
+        [
+            (
+                r["title"],
+                artist_ids.get(r["artist"]),
+                album_ids[(r["album"], None)],
+                r["popularity"],
+                r["ref_id"],
+            )
+            for r in rows
+        ],
+    )
+    cur.close()
+
+
+def update_books(conn, batch, cache):
+    rows = records(batch)
+    author_ids = resolve_names(conn, "authors", [r["author"] for r in rows], cache)
+    cur = conn.cursor()
+    cur.executemany(
+        "UPDATE books SET title = %s, author_id = %s, year = %s WHERE id = %s",
+        [(r["title"], author_ids.get(r["author"]), r["year"], r["ref_id"]) for r in rows],
+    )
+    cur.close()
+
+
+def unlink_song_genres(conn, pairs):
+    """Drop the genre link of removed (track, genre) rows whose song is still listed."""
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        DELETE ig FROM item_genres ig
+        INNER JOIN genres g ON g.id = ig.genre_id
+        WHERE ig.item_id = %s AND g.name = %s
+        """,
+        [(item_id, key.rsplit("|", 1)[1]) for item_id, key in pairs],
+    )
+    cur.close()
+
+
+DELTA_SOURCES = {
+    "movies": {
+        "table": "movies",
+        "read": read_movies,
+        "hash_columns": ("title", "year", "vote_avg", "director", "genres"),
+        "insert": write_movie_chunk,
+        "update": update_movies,
+    },
+    "songs": {
+        "table": "songs",
+        "read": read_songs,
+        "hash_columns": ("title", "artist", "album", "popularity", "genre"),
+        "insert": write_song_chunk,
+        "update": update_songs,
+        "unlink": unlink_song_genres,
+    },
+    "books": {
+        "table": "books",
+        "read": read_books,
+        "hash_columns": ("title", "author", "year"),
+        "insert": insert_books,
+        "update": update_books,
+    },
+}
+
+
+# -----------------------------
+# DIFF AND APPLY
+# -----------------------------
+def diff_source(conn, source, paths, chunk_size):
+    """Hash the CSV and compare it with the snapshot.
+
+    Returns (new hashes by key, snapshot, inserted keys, changed keys,
+    removed keys, rows read).
+    """
+    spec = DELTA_SOURCES[source]
+    new = {}
+    rows_read = 0
+    for frame in spec["read"](paths, chunk_size):
+        rows_read += len(frame)
+        for key, row_hash in zip(frame["key"], row_hashes(frame, spec["hash_columns"])):
+            # First row wins for keys repeated in the file
+            new.setdefault(key, int(row_hash))
+
+    old = load_snapshot(conn, source)
+    inserts = {key for key in new if key not in old}
+    updates = {key for key in new if key in old and old[key][1] != new[key]}
+    deletes = {key for key in old if key not in new}
+    return new, old, inserts, updates, deletes, rows_read
+
+
+def collect_rows(source, paths, chunk_size, keys):
+    """Second pass over the CSV keeping only the rows of `keys` (first row per key)."""
+    spec = DELTA_SOURCES[source]
+    parts = []
+    seen = set()
+    for frame in spec["read"](paths, chunk_size):
+        frame = frame[frame["key"].isin(keys) & ~frame["key"].isin(seen)]
+        frame = frame.drop_duplicates(subset="key")
+        seen.update(frame["key"])
+        parts.append(frame)
+    return pd.concat(parts) if parts else pd.DataFrame(columns=["key"])
+
+
+def apply_delta(source, paths=None, chunk_size=STREAM_CHUNK_SIZE, dry_run=False):
+    """Diff one source's CSV against its snapshot and apply the changes."""
+    spec = DELTA_SOURCES[source]
+    paths = paths or CSV_PATHS[source]
+    conn = get_connection()
+
+    new, old, inserts, updates, deletes, rows_read = diff_source(
+        conn, source, paths, chunk_size
+    )
+    summary = (
+        f"{source}: {len(inserts):,} new, {len(updates):,} changed, "
+        f"{len(deletes):,} removed, "
+        f"{len(new) - len(inserts) - len(updates):,} unchanged ({rows_read:,} rows read)"
+    )
+    if dry_run or not (inserts or updates or deletes):
+        conn.close()
+        print(summary + (" [dry run]" if dry_run else ""))
+        return
+
+    cache = DimensionCache(conn)
+    changed = collect_rows(source, paths, chunk_size, inserts | updates)
+    changed["row_hash"] = changed["key"].map(new)
+
+    # Changed rows whose item has since been deleted are inserted again
+    upd = changed[changed["key"].isin(updates)].copy()
+    upd["item_id"] = upd["key"].map(lambda k: old[k][0])
+    refs = select_ref_ids(conn, upd["item_id"].tolist())
+    upd["ref_id"] = upd["item_id"].map(refs)
+    ins = pd.concat([changed[changed["key"].isin(inserts)], upd[upd["ref_id"].isna()]])
+    upd = upd[upd["ref_id"].notna()].astype({"ref_id": int})
+
+    for start in range(0, len(ins), chunk_size):
+        batch = ins.iloc[start : start + chunk_size]
+        item_ids = spec["insert"](conn, batch, cache)
+        save_snapshot(conn, source, list(zip(batch["key"], item_ids, batch["row_hash"])))
+        conn.commit()
+
+    for start in range(0, len(upd), chunk_size):
+        batch = upd.iloc[start : start + chunk_size]
+        spec["update"](conn, batch, cache)
+        save_snapshot(
+            conn, source, list(zip(batch["key"], batch["item_id"], batch["row_hash"]))
+        )
+        conn.commit()
+
+    cur = conn.cursor()
+    for batch in chunked(sorted(deletes), IN_BATCH):
+        item_ids = {old[key][0] for key in batch}
+        cur.execute(
+            f"DELETE FROM item_sources WHERE source = %s AND natural_key IN ({_in_list(batch)})",
+            [source] + batch,
+        )
+        # Items still backed by another source row are kept
+        ids = list(item_ids)
+        cur.execute(
+            f"SELECT DISTINCT item_id FROM item_sources WHERE item_id IN ({_in_list(ids)})",
+            ids,
+        )
+        kept = {row[0] for row in cur.fetchall()}
+        if spec.get("unlink"):
+            spec["unlink"](conn, [(old[k][0], k) for k in batch if old[k][0] in kept])
+        delete_items(conn, spec["table"], item_ids - kept)
+        conn.commit()
+    cur.close()
+
+    conn.close()
+    print(summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Apply only the new, changed and removed rows of refreshed CSVs."
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        help=f"sources to refresh: {', '.join(DELTA_SOURCES)} (default: all)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only report what would change"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=STREAM_CHUNK_SIZE, help="CSV rows read at a time"
+    )
+    args = parser.parse_args()
+    unknown = [source for source in args.sources if source not in DELTA_SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+
+    for source in args.sources or DELTA_SOURCES:
+        apply_delta(source, chunk_size=args.chunk_size, dry_run=args.dry_run)
@@ -1,5 +1,6 @@
 """Initialize roles and permissions in the database."""
 from db import get_connection
+from auth_helpers import invalidate_user_auth
 
 # Define permissions
 PERMISSIONS = [
@@ -87,6 +88,9 @@ def init_roles(permission_ids):
     conn.commit()
     cur.close()
     conn.close()
+
+    # Role/permission links may have changed for every user
+    invalidate_user_auth()
     return role_ids
 
 
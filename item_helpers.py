@@ -0,0 +1,95 @@
+"""Batched lookups of unified items (the items table) and their media rows."""
+
+from collections import defaultdict
+
+from search_helpers import SEARCH_SOURCES
+
+
+def in_list(values):
+    """Placeholders for an IN (...) clause over `values`."""
+    return ", ".join(["%s"] * len(values))
+
+
+def fetch_items(cur, item_ids):
+    """Title, year, creator and normalized rating for each item id.
+
+    Issues one query on items plus one IN (...) query per media type, so
+    the query count does not grow with the number of ids. Returns
+    {item_id: row}; ids that do not exist are missing from the result.
+    """
+    item_ids = list(dict.fromkeys(item_ids))
+    if not item_ids:
+        return {}
+
+    cur.execute(
+        f"SELECT id, item_type, ref_id FROM items WHERE id IN ({in_list(item_ids)})",
+        item_ids,
+    )
+    by_type = defaultdict(dict)
+    for row in cur.fetchall():
+        by_type[row["item_type"]][row["ref_id"]] = row["id"]
+
+    items = {}
+    for media_type, refs in by_type.items():
+        src = SEARCH_SOURCES.get(media_type)
+        if src is None:
+            continue
+        ref_ids = list(refs)
+        cur.execute(
+            f"""
+            SELECT m.id AS ref_id, m.title, m.year, p.name AS creator,
+                   m.{src["rating"]} AS rating,
+                   m.{src["rating"]} / {src["rating_scale"]} AS norm_rating
+            FROM {src["table"]} m
+            LEFT JOIN {src["person_table"]} p ON p.id = m.{src["person_fk"]}
+            WHERE m.id IN ({in_list(ref_ids)})
+            """,
+            ref_ids,
+        )
+        for row in cur.fetchall():
+            item_id = refs[row["ref_id"]]
+            items[item_id] = dict(row, item_id=item_id, item_type=media_type)
+    return items
+
+
+def fetch_item_genres(cur, item_ids):
+    """{item_id: [genre names]} for the given items, in one query."""
+    item_ids = list(dict.fromkeys(item_ids))
+    genres = {item_id: [] for item_id in item_ids}
+    if not item_ids:
+        return genres
+    cur.execute(
+        f"""
+        SELECT ig.item_id, g.name
+        FROM item_genres ig
+        INNER JOIN genres g ON g.id = ig.genre_id
+        WHERE ig.item_id IN ({in_list(item_ids)})
+        ORDER BY g.name
+        """,
+        item_ids,
+    )
+    for row in cur.fetchall():
+        genres[row["item_id"]].append(row["name"])
+    return genres
+
+
+def fetch_item_ratings(cur, item_ids):
+    """{item_id: [{source, source_key, rating}, ...]} for the given items, in one query."""
+    item_ids = list(dict.fromkeys(item_ids))
+    ratings = {item_id: [] for item_id in item_ids}
+    if not item_ids:
+        return ratings
+    cur.execute(
+        f"""
+        SELECT item_id, source, source_key, rating
+        FROM ratings
+        WHERE item_id IN ({in_list(item_ids)})
+        ORDER BY item_id, source, source_key
+        """,
+        item_ids,
+    )
+    for row in cur.fetchall():
+        ratings[row["item_id"]].append(
+            {"source": row["source"], "source_key": row["source_key"], "rating": row["rating"]}
+        )
+    return ratings
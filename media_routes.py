@@ -1,10 +1,12 @@
 """Media CRUD routes (movies, songs, books)."""
 
-from flask import Blueprint, render_template, request, redirect, url_for, session
+from flask import Blueprint, render_template, request, redirect, url_for
 from db import get_connection
 from auth_decorators import permission_required
-from auth_helpers import get_user_permissions
+from auth_helpers import get_session_permission_names
 from audit_helpers import log_action_from_session
+from pagination_helpers import fetch_year_id_page
+from search_helpers import title_filter_clause
 
 # Create a Blueprint for media routes
 media_bp = Blueprint("media", __name__)
@@ -12,10 +14,7 @@ media_bp = Blueprint("media", __name__)
 
 def get_user_permissions_dict():
     """Get current user's permissions as a dictionary for template use."""
-    if "user_id" not in session:
-        return {}
-    permissions = get_user_permissions(session["user_id"])
-    return {perm["name"]: True for perm in permissions}
+    return {name: True for name in get_session_permission_names()}
 
 
 # ============================================
@@ -28,8 +27,9 @@ def get_user_permissions_dict():
 def list_movies():
     """
     READ + FILTER
-    - Shows first N movies
-    - Optional ?title= filter (LIKE search)
+    - Shows one page of movies, newest first
+    - Keyset pagination via ?after= / ?before= cursors and ?page_size=
+    - Optional ?title= filter (full-text search)
     - Optional ?min_rating=
     """
     title_filter = request.args.get("title", default="", type=str)
@@ -42,17 +42,15 @@ def list_movies():
     params = []
 
     if title_filter:
-        query += " AND title LIKE %s"
-        params.append(f"%{title_filter}%")
+        clause, clause_params = title_filter_clause(title_filter)
+        query += " AND " + clause
+        params.extend(clause_params)
 
     if min_rating is not None:
         query += " AND imdb_rating >= %s"
         params.append(min_rating)
 
-    query += " ORDER BY year DESC LIMIT 50"
-
-    cur.execute(query, params)
-    rows = cur.fetchall()
+    rows, page = fetch_year_id_page(cur, query, params, request.args)
 
     cur.close()
     conn.close()
@@ -60,6 +58,7 @@ def list_movies():
     return render_template(
         "movies_list.html",
         movies=rows,
+        page=page,
         title_filter=title_filter,
         min_rating=min_rating if min_rating is not None else "",
         permissions=get_user_permissions_dict(),
@@ -82,8 +81,13 @@ def create_movie():
             (title, year, imdb_rating, None),  # no director yet
         )
 
-        conn.commit()
         movie_id = cur.lastrowid
+
+        # Register in the unified items catalog so it shows up in /search
+        cur.execute(
+            "INSERT INTO items (item_type, ref_id) VALUES (%s, %s)", ("movie", movie_id)
+        )
+        conn.commit()
         cur.close()
         conn.close()
 
@@ -161,8 +165,9 @@ def delete_movie(movie_id):
 def list_songs():
     """
     READ + FILTER
-    - Shows first N songs
-    - Optional ?title= filter (LIKE search)
+    - Shows one page of songs, newest first
+    - Keyset pagination via ?after= / ?before= cursors and ?page_size=
+    - Optional ?title= filter (full-text search)
     - Optional ?min_popularity=
     """
     title_filter = request.args.get("title", default="", type=str)
@@ -175,17 +180,15 @@ def list_songs():
     params = []
 
     if title_filter:
-        query += " AND title LIKE %s"
-        params.append(f"%{title_filter}%")
+        clause, clause_params = title_filter_clause(title_filter)
+        query += " AND " + clause
+        params.extend(clause_params)
 
     if min_popularity is not None:
         query += " AND spotify_popularity >= %s"
         params.append(min_popularity)
 
-    query += " ORDER BY year DESC LIMIT 50"
-
-    cur.execute(query, params)
-    rows = cur.fetchall()
+    rows, page = fetch_year_id_page(cur, query, params, request.args)
 
     cur.close()
     conn.close()
@@ -193,6 +196,7 @@ def list_songs():
     return render_template(
         "songs_list.html",
         songs=rows,
+        page=page,
         title_filter=title_filter,
         min_popularity=min_popularity if min_popularity is not None else "",
         permissions=get_user_permissions_dict(),
@@ -215,8 +219,13 @@ def create_song():
             (title, None, None, spotify_popularity, year),  # no artist/album yet
         )
 
-        conn.commit()
         song_id = cur.lastrowid
+
+        # Register in the unified items catalog so it shows up in /search
+        cur.execute(
+            "INSERT INTO items (item_type, ref_id) VALUES (%s, %s)", ("song", song_id)
+        )
+        conn.commit()
         cur.close()
         conn.close()
 
@@ -295,8 +304,9 @@ def delete_song(song_id):
 def list_books():
     """
     READ + FILTER
-    - Shows first N books
-    - Optional ?title= filter (LIKE search)
+    - Shows one page of books, newest first
+    - Keyset pagination via ?after= / ?before= cursors and ?page_size=
+    - Optional ?title= filter (full-text search)
     - Optional ?min_rating=
     """
     title_filter = request.args.get("title", default="", type=str)
@@ -309,17 +319,15 @@ def list_books():
     params = []
 
     if title_filter:
-        query += " AND title LIKE %s"
-        params.append(f"%{title_filter}%")
+        clause, clause_params = title_filter_clause(title_filter)
+        query += " AND " + clause
+        params.extend(clause_params)
 
     if min_rating is not None:
         query += " AND avg_rating >= %s"
         params.append(min_rating)
 
-    query += " ORDER BY year DESC LIMIT 50"
-
-    cur.execute(query, params)
-    rows = cur.fetchall()
+    rows, page = fetch_year_id_page(cur, query, params, request.args)
 
     cur.close()
     conn.close()
@@ -327,6 +335,7 @@ def list_books():
     return render_template(
         "books_list.html",
         books=rows,
+        page=page,
         title_filter=title_filter,
         min_rating=min_rating if min_rating is not None else "",
         permissions=get_user_permissions_dict(),
@@ -349,8 +358,13 @@ def create_book():
             (title, None, year, avg_rating),  # no author yet
         )
 
-        conn.commit()
         book_id = cur.lastrowid
+
+        # Register in the unified items catalog so it shows up in /search
+        cur.execute(
+            "INSERT INTO items (item_type, ref_id) VALUES (%s, %s)", ("book", book_id)
+        )
+        conn.commit()
         cur.close()
         conn.close()
 
@@ -0,0 +1,308 @@
+"""Versioned schema migrations and hot-query index checks.
+
+Usage:
+  python migrate.py           Apply pending migrations from migrations/
+  python migrate.py status    List applied and pending migrations
+  python migrate.py check     EXPLAIN the hot queries; exit 1 on a full scan
+"""
+import os
+import sys
+
+import mysql.connector
+from audit_maintenance import AUDIT_RETENTION_CONFIG, ensure_partitions
+from db import get_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# MySQL errors meaning the object a statement creates is already there, or
+# the one it drops is already gone (e.g. a fresh database built from
+# schema.sql, which already has the change).
+ALREADY_APPLIED_ERRNOS = {
+    1050,  # Table already exists
+    1060,  # Duplicate column name
+    1061,  # Duplicate key name
+    1091,  # Can't DROP: the key or foreign key is already gone
+}
+
+# Queries on hot paths. `table` is the table that must be reached through
+# an index; EXPLAIN showing type=ALL on it counts as a failure.
+HOT_QUERIES = [
+    {
+        "name": "items by (item_type, ref_id)",
+        "table": "items",
+        "sql": "SELECT id FROM items WHERE item_type = %s AND ref_id = %s",
+        "params": ("movie", 1),
+    },
+    {
+        "name": "item_genres by (item_id, genre_id)",
+        "table": "item_genres",
+        "sql": "SELECT id FROM item_genres WHERE item_id = %s AND genre_id = %s",
+        "params": (1, 1),
+    },
+    {
+        "name": "ratings by item",
+        "table": "ratings",
+        "sql": "SELECT source, rating FROM ratings WHERE item_id = %s",
+        "params": (1,),
+    },
+    {
+        "name": "item_similar by item",
+        "table": "item_similar",
+        "sql": """
+            SELECT similar_item_id, score
+            FROM item_similar
+            WHERE item_id = %s
+            ORDER BY neighbor_rank
+            LIMIT 20
+        """,
+        "params": (1,),
+    },
+    {
+        "name": "genre_top_items by genres",
+        "table": "genre_top_items",
+        "sql": """
+            SELECT genre_id, item_id, score
+            FROM genre_top_items
+            WHERE genre_id IN (%s, %s)
+            ORDER BY genre_id, item_rank
+        """,
+        "params": (1, 2),
+    },
+    {
+        "name": "audit_logs by user, newest first",
+        "table": "al",
+        "sql": """
+            SELECT al.id, al.action, al.created_at
+            FROM audit_logs al
+            WHERE al.user_id = %s
+            ORDER BY al.created_at DESC
+            LIMIT 100
+        """,
+        "params": (1,),
+    },
+    {
+        "name": "audit_logs newest first",
+        "table": "al",
+        "sql": """
+            SELECT al.id, al.action, al.created_at
+            FROM audit_logs al
+            ORDER BY al.created_at DESC, al.id DESC
+            LIMIT 100
+        """,
+        "params": (),
+    },
+    {
+        "name": "audit_logs by action prefix",
+        "table": "al",
+        "sql": "SELECT al.id FROM audit_logs al WHERE al.action LIKE %s LIMIT 100",
+        "params": ("Created%",),
+    },
+    {
+        "name": "sessions by user",
+        "table": "sessions",
+        "sql": "SELECT id, started_at FROM sessions WHERE user_id = %s",
+        "params": (1,),
+    },
+    {
+        "name": "sessions before a cutoff (rollup)",
+        "table": "sessions",
+        "sql": "SELECT MIN(started_at) FROM sessions WHERE started_at < %s",
+        "params": ("2000-01-01",),
+    },
+    {
+        "name": "genres by name",
+        "table": "genres",
+        "sql": "SELECT id FROM genres WHERE name = %s",
+        "params": ("Drama",),
+    },
+    {
+        "name": "artists by name",
+        "table": "artists",
+        "sql": "SELECT id FROM artists WHERE name = %s",
+        "params": ("x",),
+    },
+    {
+        "name": "authors by name",
+        "table": "authors",
+        "sql": "SELECT id FROM authors WHERE name = %s",
+        "params": ("x",),
+    },
+    {
+        "name": "creators by name",
+        "table": "creators",
+        "sql": "SELECT id FROM creators WHERE name = %s",
+        "params": ("x",),
+    },
+    {
+        "name": "user permissions",
+        "table": "ur",
+        "sql": """
+            SELECT r.name AS role_name, p.name AS permission_name
+            FROM user_roles ur
+            INNER JOIN roles r ON r.id = ur.role_id
+            LEFT JOIN role_permissions rp ON rp.role_id = r.id
+            LEFT JOIN permissions p ON p.id = rp.permission_id
+            WHERE ur.user_id = %s
+        """,
+        "params": (1,),
+    },
+]
+
+
+def list_migrations():
+    """Return [(version, path), ...] for every .sql file in migrations/, in order."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith(".sql"):
+            version = filename[: -len(".sql")]
+            migrations.append((version, os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def split_statements(sql_text):
+    """Split a migration file into statements (comment lines are dropped)."""
+    lines = [
+        line for line in sql_text.splitlines() if not line.strip().startswith("--")
+    ]
+    statements = [stmt.strip() for stmt in "\n".join(lines).split(";")]
+    return [stmt for stmt in statements if stmt]
+
+
+def ensure_migrations_table(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """
+    )
+
+
+def get_applied_versions(cur):
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def split_audit_partitions(conn):
+    """Split p_future into monthly partitions right after 0007 partitions audit_logs.
+
+    0007 ends p_old at a fixed date, so every month after it would land in
+    p_future; splitting now copies p_future once, while it is small.
+    """
+    added = ensure_partitions(conn, AUDIT_RETENTION_CONFIG["months_ahead"])
+    print(f"  Added audit_logs partitions: {', '.join(added) or '(none needed)'}")
+
+
+# Run after a migration's statements, before it is recorded as applied
+POST_MIGRATION_HOOKS = {
+    "0007_audit_logs_partitioning": split_audit_partitions,
+}
+
+
+def apply_migration(conn, version, path):
+    """Run every statement of one migration (and its hook) and record it as applied."""
+    cur = conn.cursor()
+    with open(path, encoding="utf-8") as f:
+        statements = split_statements(f.read())
+
+    for stmt in statements:
+        try:
+            cur.execute(stmt)
+        except mysql.connector.Error as e:
+            if e.errno in ALREADY_APPLIED_ERRNOS:
+                print(f"  (already present) {stmt.splitlines()[0]}")
+                continue
+            cur.close()
+            raise
+
+    hook = POST_MIGRATION_HOOKS.get(version)
+    if hook is not None:
+        hook(conn)
+
+    cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+    conn.commit()
+    cur.close()
+
+
+def migrate():
+    """Apply all pending migrations in version order."""
+    conn = get_connection()
+    cur = conn.cursor()
+    ensure_migrations_table(cur)
+    applied = get_applied_versions(cur)
+    cur.close()
+
+    pending = [(v, p) for v, p in list_migrations() if v not in applied]
+    if not pending:
+        print("Database is up to date.")
+    for version, path in pending:
+        print(f"Applying {version}...")
+        try:
+            apply_migration(conn, version, path)
+        except mysql.connector.Error as e:
+            print(f"Error applying {version}: {e}")
+            conn.close()
+            return False
+        print(f"✅ Applied {version}")
+
+    conn.close()
+    return True
+
+
+def status():
+    """Print applied and pending migrations."""
+    conn = get_connection()
+    cur = conn.cursor()
+    ensure_migrations_table(cur)
+    applied = get_applied_versions(cur)
+    cur.close()
+    conn.close()
+
+    for version, _ in list_migrations():
+        mark = "applied" if version in applied else "pending"
+        print(f"  [{mark}] {version}")
+
+
+def check_hot_queries():
+    """EXPLAIN each hot query and report any that fall back to a full table scan."""
+    conn = get_connection()
+    cur = conn.cursor(dictionary=True)
+
+    failures = []
+    for query in HOT_QUERIES:
+        cur.execute("EXPLAIN " + query["sql"], query["params"])
+        plan = cur.fetchall()
+        full_scans = [
+            row for row in plan if row["table"] == query["table"] and row["type"] == "ALL"
+        ]
+        if full_scans:
+            failures.append(query["name"])
+            print(f"❌ {query['name']}: full scan of {query['table']}")
+        else:
+            keys = ", ".join(
+                str(row["key"]) for row in plan if row["table"] == query["table"]
+            )
+            print(f"✅ {query['name']}: {keys or 'no scan needed'}")
+
+    cur.close()
+    conn.close()
+    return failures
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+
+    if command == "migrate":
+        sys.exit(0 if migrate() else 1)
+    elif command == "status":
+        status()
+    elif command == "check":
+        failures = check_hot_queries()
+        if failures:
+            print(f"\n{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} fell back to a full scan.")
+            sys.exit(1)
+        print("\nAll hot queries use an index.")
+    else:
+        print(__doc__)
+        sys.exit(1)
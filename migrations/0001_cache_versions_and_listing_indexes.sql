@@ -0,0 +1,22 @@
+-- Objects added to schema.sql for the RBAC cache, keyset pagination
+-- and full-text search, for databases created before them.
+
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO cache_versions (name, version) VALUES ('rbac', 0);
+
+-- Keyset pagination on (year, id) for the list pages
+CREATE INDEX idx_movies_year_id ON movies (year, id);
+CREATE INDEX idx_songs_year_id ON songs (year, id);
+CREATE INDEX idx_books_year_id ON books (year, id);
+
+-- Full-text search over titles and creator names
+CREATE FULLTEXT INDEX ft_movies_title ON movies (title);
+CREATE FULLTEXT INDEX ft_songs_title ON songs (title);
+CREATE FULLTEXT INDEX ft_books_title ON books (title);
+CREATE FULLTEXT INDEX ft_creators_name ON creators (name);
+CREATE FULLTEXT INDEX ft_artists_name ON artists (name);
+CREATE FULLTEXT INDEX ft_authors_name ON authors (name);
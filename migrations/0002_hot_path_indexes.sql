@@ -0,0 +1,34 @@
+-- Indexes for the equality lookups made by upload_data.py and the auth
+-- helpers. The UNIQUE keys fail if duplicate rows already exist; remove
+-- them first (see the duplicate checks at the end of this file).
+
+-- One items row per media row; also serves get_or_create_item
+CREATE UNIQUE INDEX uq_items_type_ref ON items (item_type, ref_id);
+
+-- One link per (item, genre); also serves get_or_create_item_genre
+CREATE UNIQUE INDEX uq_item_genres_item_genre ON item_genres (item_id, genre_id);
+
+-- Ratings of an item, optionally by source
+CREATE INDEX idx_ratings_item_source ON ratings (item_id, source);
+
+-- Per-user audit history, newest first
+CREATE INDEX idx_audit_logs_user_created ON audit_logs (user_id, created_at);
+
+-- Per-user login history
+CREATE INDEX idx_sessions_user_started ON sessions (user_id, started_at);
+
+-- Dimension lookups by name
+CREATE UNIQUE INDEX uq_artists_name ON artists (name);
+CREATE UNIQUE INDEX uq_authors_name ON authors (name);
+CREATE UNIQUE INDEX uq_creators_name ON creators (name);
+CREATE INDEX idx_albums_title_year ON albums (title, year);
+
+-- Fact-table dedupe probes in upload_data.py
+CREATE INDEX idx_movies_title_year ON movies (title, year);
+CREATE INDEX idx_songs_title_artist_album ON songs (title, artist_id, album_id);
+CREATE INDEX idx_books_title_author_year ON books (title, author_id, year);
+
+-- Duplicate checks (run manually if a UNIQUE index above fails):
+--   SELECT item_type, ref_id, COUNT(*) FROM items GROUP BY item_type, ref_id HAVING COUNT(*) > 1;
+--   SELECT item_id, genre_id, COUNT(*) FROM item_genres GROUP BY item_id, genre_id HAVING COUNT(*) > 1;
+--   SELECT name, COUNT(*) FROM artists GROUP BY name HAVING COUNT(*) > 1;
@@ -0,0 +1,30 @@
+-- Resumable ingestion: per-source checkpoint of the last committed chunk,
+-- and a natural key on ratings so reloads upsert instead of duplicating.
+
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    source VARCHAR(100) PRIMARY KEY,
+    file_hash CHAR(64) NOT NULL,
+    chunk_size INT NOT NULL,
+    row_limit INT NULL,
+    chunks_done INT NOT NULL DEFAULT 0,
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Identifies a rating within its source (e.g. the Ratings.csv User-ID);
+-- empty for one-per-item sources such as tmdb_vote_average.
+ALTER TABLE ratings ADD COLUMN source_key VARCHAR(64) NOT NULL DEFAULT '' AFTER source;
+
+-- Ratings loaded before this migration have no key. Repeated TMDB votes
+-- for an item are rerun duplicates: keep the first one.
+DELETE r1 FROM ratings r1
+INNER JOIN ratings r2
+    ON r2.item_id = r1.item_id AND r2.source = r1.source AND r2.id < r1.id
+WHERE r1.source = 'tmdb_vote_average' AND r1.source_key = '';
+
+-- Old book ratings lost their User-ID; key them by row id so none is dropped.
+UPDATE ratings SET source_key = CONCAT('legacy:', id)
+WHERE source = 'book_ratings_csv' AND source_key = '';
+
+CREATE UNIQUE INDEX uq_ratings_item_source_key ON ratings (item_id, source, source_key);
@@ -0,0 +1,14 @@
+-- Snapshot of the source rows behind each item, used by delta_ingest.py
+-- to diff a refreshed CSV against the previous load.
+
+CREATE TABLE IF NOT EXISTS item_sources (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    source VARCHAR(50) NOT NULL,
+    natural_key VARCHAR(255) NOT NULL,
+    item_id INT NOT NULL,
+    row_hash BIGINT UNSIGNED NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (item_id) REFERENCES items(id),
+    UNIQUE INDEX uq_item_sources_source_key (source, natural_key),
+    INDEX idx_item_sources_item (item_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
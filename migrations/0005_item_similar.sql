@@ -0,0 +1,13 @@
+-- Top-K most similar items per item, precomputed by build_similarity.py
+-- and served by /items/<id>/similar. Rebuilt wholesale and swapped in by
+-- RENAME TABLE, so it has no foreign keys; stale neighbors of deleted
+-- items are filtered out when read.
+
+CREATE TABLE IF NOT EXISTS item_similar (
+    item_id INT NOT NULL,
+    neighbor_rank SMALLINT NOT NULL,
+    similar_item_id INT NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (item_id, neighbor_rank),
+    INDEX idx_item_similar_similar (similar_item_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
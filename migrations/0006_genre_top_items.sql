@@ -0,0 +1,11 @@
+-- Best-rated items of each genre, precomputed by build_similarity.py;
+-- /recommendations merges the lists of a user's preferred genres.
+-- Swapped in whole by RENAME TABLE, so it has no foreign keys.
+
+CREATE TABLE IF NOT EXISTS genre_top_items (
+    genre_id INT NOT NULL,
+    item_rank SMALLINT NOT NULL,
+    item_id INT NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (genre_id, item_rank)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
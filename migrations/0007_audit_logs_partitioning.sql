@@ -0,0 +1,34 @@
+-- Monthly RANGE partitions on audit_logs.created_at, so old months are
+-- archived and dropped whole (see audit_maintenance.py) instead of being
+-- deleted row by row. MySQL partitioned tables cannot have foreign keys,
+-- and every unique key, the primary key included, must contain created_at.
+-- Rows from before partitioning stay in p_old; audit_maintenance.py
+-- splits p_future into one partition per month ahead of time.
+-- p_old ends at a fixed date, so migrate.py runs that split (as
+-- `python audit_maintenance.py partitions` would) right after this file,
+-- before months past that date pile up in p_future.
+
+ALTER TABLE audit_logs DROP FOREIGN KEY audit_logs_ibfk_1;
+
+-- Newest-first listing of the /audit-logs page and keyset paging on it
+ALTER TABLE audit_logs
+    MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at),
+    ADD INDEX idx_audit_logs_created_id (created_at, id);
+
+ALTER TABLE audit_logs
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_old VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- One row per audit partition exported and dropped by audit_maintenance.py
+CREATE TABLE IF NOT EXISTS audit_archives (
+    partition_name VARCHAR(64) PRIMARY KEY,
+    range_start TIMESTAMP NULL,
+    range_end TIMESTAMP NOT NULL,
+    row_count BIGINT NOT NULL,
+    path VARCHAR(512),
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,2 @@
+-- Action-prefix filter of the /audit-logs explorer (LIKE 'prefix%')
+CREATE INDEX idx_audit_logs_action_created ON audit_logs (action, created_at);
@@ -0,0 +1,22 @@
+-- Session tracking: sessions older than the retention window are rolled up
+-- into daily_logins and pruned by session_maintenance.py, which walks
+-- sessions by started_at. Per-user history keeps using
+-- idx_sessions_user_started (migration 0002).
+
+CREATE INDEX idx_sessions_started ON sessions (started_at);
+
+-- Logins per user per day, for sessions pruned from the sessions table
+CREATE TABLE IF NOT EXISTS daily_logins (
+    login_date DATE NOT NULL,
+    user_id INT NOT NULL,
+    logins INT NOT NULL,
+    PRIMARY KEY (login_date, user_id),
+    INDEX idx_daily_logins_user_date (user_id, login_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Last request time per user, written at most every few minutes per user
+CREATE TABLE IF NOT EXISTS user_last_seen (
+    user_id INT PRIMARY KEY,
+    last_seen_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES app_users(id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,130 @@
+"""Keyset (cursor) pagination helpers."""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values):
+    """Encode a list of sort-key values into an opaque URL-safe token."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_cursor_value(value):
+    # Scalars only: nested lists/dicts (or booleans) would reach the query as
+    # parameters the connector cannot bind
+    return value is None or (
+        isinstance(value, (str, int, float)) and not isinstance(value, bool)
+    )
+
+
+def decode_cursor(token, length=None):
+    """Decode a token made by encode_cursor(); returns None if it is invalid.
+
+    A valid cursor is a list of scalar values (str, int, float or None),
+    with exactly `length` of them when `length` is given.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or not all(_is_cursor_value(v) for v in values):
+        return None
+    if length is not None and len(values) != length:
+        return None
+    return values
+
+
+def get_page_size(args, default=DEFAULT_PAGE_SIZE):
+    """Read ?page_size= from request args, clamped to 1..MAX_PAGE_SIZE."""
+    size = args.get("page_size", default=default, type=int) or default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _year_id_keyset(cursor, backward):
+    """WHERE fragment selecting rows after (or before) a (year, id) cursor.
+
+    Rows are ordered by year DESC, id DESC; MySQL sorts NULL years last in
+    that order, so they are handled explicitly rather than with a row
+    comparison.
+    """
+    year, row_id = cursor
+    if not backward:
+        if year is None:
+            return "(year IS NULL AND id < %s)", [row_id]
+        return (
+            "(year < %s OR (year = %s AND id < %s) OR year IS NULL)",
+            [year, year, row_id],
+        )
+    if year is None:
+        return "(year IS NOT NULL OR id > %s)", [row_id]
+    return "(year > %s OR (year = %s AND id > %s))", [year, year, row_id]
+
+
+def fetch_year_id_page(cur, query, params, args):
+    """Run `query` (a SELECT ... WHERE ...) as one keyset page ordered by (year, id).
+
+    `args` are the request args carrying ?after= / ?before= / ?page_size=.
+    The selected columns must include `year` and `id`. Returns (rows, page)
+    where page holds the next/prev cursor tokens for the template.
+    """
+    page_size = get_page_size(args)
+    cursor, backward = read_cursor(args)
+
+    params = list(params)
+    if cursor is not None:
+        clause, clause_params = _year_id_keyset(cursor, backward)
+        query += " AND " + clause
+        params.extend(clause_params)
+
+    if backward:
+        query += " ORDER BY year ASC, id ASC LIMIT %s"
+    else:
+        query += " ORDER BY year DESC, id DESC LIMIT %s"
+    params.append(page_size + 1)
+
+    cur.execute(query, params)
+    return finish_page(
+        cur.fetchall(), page_size, cursor, backward, lambda r: [r["year"], r["id"]]
+    )
+
+
+def read_cursor(args, length=2):
+    """Return (cursor, backward) from the ?after= / ?before= request args.
+
+    Cursors that do not decode to `length` scalar values are ignored.
+    """
+    before = decode_cursor(args.get("before"), length)
+    if before is not None:
+        return before, True
+    return decode_cursor(args.get("after"), length), False
+
+
+def finish_page(rows, page_size, cursor, backward, key):
+    """Trim a page fetched with LIMIT page_size + 1 and work out its cursors.
+
+    `key(row)` returns the row's sort-key values. Returns (rows, page) where
+    page holds the next/prev cursor tokens for the template.
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+
+    page = {"page_size": page_size, "next": None, "prev": None}
+    if rows:
+        first = encode_cursor(key(rows[0]))
+        last = encode_cursor(key(rows[-1]))
+        if backward:
+            page["prev"] = first if has_more else None
+            page["next"] = last
+        else:
+            page["prev"] = first if cursor is not None else None
+            page["next"] = last if has_more else None
+    return rows, page
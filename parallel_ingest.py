@@ -0,0 +1,310 @@
+"""Parallel loader for all CSV datasets.
+
+CSV chunks are parsed in a process pool (one worker per core by default)
+while each dataset writes its parsed chunks through its own pooled DB
+connection. Datasets run concurrently except where one depends on
+another: book ratings start once books are loaded. Within a chunk,
+dimension rows (authors, artists, albums, creators, genres) are always
+resolved before the facts that reference them.
+
+With --resume every dataset is checkpointed per committed chunk (see
+checkpoint_helpers.py): a rerun continues where it stopped and skips
+datasets whose files are unchanged since a complete load.
+
+Usage:
+  python parallel_ingest.py [--workers N] [--limit N] [--chunk-size N] [--resume]
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import mysql.connector
+import pandas as pd
+
+from checkpoint_helpers import Checkpoint
+from db import ConnectionPool
+from upload_data import (
+    DB_CONFIG,
+    DimensionCache,
+    director_lookup,
+    prepare_books,
+    prepare_songs,
+    read_csv_chunks,
+    STREAM_CHUNK_SIZE,
+    BOOK_COLUMNS,
+    SONG_COLUMNS,
+    MOVIE_COLUMNS,
+    CREDIT_COLUMNS,
+    RATING_COLUMNS,
+)
+from bulk_ingest import (
+    LoadStats,
+    join_ratings,
+    parse_movie_chunk,
+    parse_rating_chunk,
+    write_book_chunk,
+    write_song_chunk,
+    write_movie_chunk,
+    write_rating_chunk,
+)
+
+# Update these paths to where your CSVs actually are:
+CSV_PATHS = {
+    "books": "csvs/Books.csv",
+    "songs": "csvs/song.csv",
+    "movies": "csvs/tmdb_5000_movies.csv",
+    "credits": "csvs/tmdb_5000_credits.csv",
+    "ratings": "csvs/Ratings.csv",
+}
+
+# Lock wait timeout / deadlock: concurrent INSERT IGNOREs into the shared
+# dimension tables can collide; the chunk is rolled back and retried.
+RETRY_ERRNOS = {1205, 1213}
+MAX_RETRIES = 3
+
+# Datasets share the dimension tables (genres in particular). Under
+# REPEATABLE READ a writer's snapshot hides a name another writer committed
+# after it, so INSERT IGNORE skips the name and the re-select cannot see
+# it; under READ COMMITTED every re-select sees the latest committed rows.
+LOADER_ISOLATION_LEVEL = "READ COMMITTED"
+
+PROGRESS_INTERVAL = 5  # Seconds between progress lines
+
+
+class Loader:
+    """Shared state of one parallel run: process pool, DB pool and per-dataset stats."""
+
+    def __init__(self, workers, chunk_size, limit, resume=False):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self.resume = resume
+        self.procs = ProcessPoolExecutor(max_workers=workers)
+        self.db_pool = ConnectionPool(DB_CONFIG, size=len(DATASETS), timeout=60)
+        self.stats = {name: LoadStats(name) for name in DATASETS}
+
+    def parsed_chunks(self, path, columns, parse, *parse_args, limit=None, skip=0, **read_kwargs):
+        """Yield (CSV rows, parse(chunk, *parse_args)) for each CSV chunk, in file order.
+
+        Parsing runs in the process pool with at most `workers` chunks in
+        flight per dataset, which keeps memory bounded.
+        """
+        pending = deque()
+        chunks = read_csv_chunks(
+            path, columns, self.chunk_size, limit, skip, **read_kwargs
+        )
+        for chunk in chunks:
+            pending.append((len(chunk), self.procs.submit(parse, chunk, *parse_args)))
+            if len(pending) >= self.workers:
+                rows, future = pending.popleft()
+                yield rows, future.result()
+        while pending:
+            rows, future = pending.popleft()
+            yield rows, future.result()
+
+    def write(self, name, paths, chunks, write):
+        """Write one dataset on a pooled connection, committing once per chunk.
+
+        `chunks(skip, limit)` yields (CSV rows, parsed chunk) pairs; with
+        --resume, chunks committed by an earlier run are skipped.
+        """
+        stats = self.stats[name]
+        conn = self.db_pool.acquire()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"SET SESSION TRANSACTION ISOLATION LEVEL {LOADER_ISOLATION_LEVEL}")
+            cur.close()
+            checkpoint = None
+            skip, limit = 0, self.limit
+            if self.resume:
+                checkpoint = Checkpoint(conn, name, paths, self.chunk_size, self.limit)
+                print(checkpoint.describe(), flush=True)
+                if checkpoint.completed:
+                    return stats
+                skip, limit = checkpoint.skip_rows, checkpoint.remaining_limit
+
+            cache = stats.cache = DimensionCache(conn)
+            for rows, chunk in chunks(skip, limit):
+                for attempt in range(MAX_RETRIES + 1):
+                    try:
+                        write(conn, chunk, cache)
+                        if checkpoint is not None:
+                            checkpoint.commit(conn, rows)
+                        else:
+                            conn.commit()
+                        break
+                    except mysql.connector.Error as e:
+                        conn.rollback()
+                        if e.errno not in RETRY_ERRNOS or attempt == MAX_RETRIES:
+                            raise
+                        # Ids added to the cache by the rolled-back chunk are gone
+                        cache = stats.cache = DimensionCache(conn)
+                stats.add_chunk(rows)
+            if checkpoint is not None:
+                checkpoint.finish(conn)
+        finally:
+            conn.close()
+        return stats
+
+    def close(self):
+        self.procs.shutdown()
+        self.db_pool.close_all()
+
+
+# -----------------------------
+# DATASETS
+# -----------------------------
+def load_books(loader):
+    path = CSV_PATHS["books"]
+
+    def chunks(skip, limit):
+        return loader.parsed_chunks(
+            path, BOOK_COLUMNS, prepare_books, limit=limit, skip=skip, dtype={"ISBN": str}
+        )
+
+    return loader.write("books", [path], chunks, write_book_chunk)
+
+
+def load_songs(loader):
+    path = CSV_PATHS["songs"]
+
+    def chunks(skip, limit):
+        return loader.parsed_chunks(
+            path, SONG_COLUMNS, prepare_songs, limit=limit, skip=skip
+        )
+
+    return loader.write("songs", [path], chunks, write_song_chunk)
+
+
+def load_movies(loader):
+    paths = [CSV_PATHS["movies"], CSV_PATHS["credits"]]
+
+    def chunks(skip, limit):
+        # Handle BOM and encoding issues in credits CSV
+        parts = loader.parsed_chunks(
+            CSV_PATHS["credits"], CREDIT_COLUMNS, director_lookup, encoding="utf-8-sig"
+        )
+        directors = pd.concat([part for _, part in parts])
+        directors = directors[~directors.index.duplicated(keep="first")]
+        yield from loader.parsed_chunks(
+            CSV_PATHS["movies"], MOVIE_COLUMNS, parse_movie_chunk, directors,
+            limit=limit, skip=skip,
+        )
+
+    return loader.write("movies", paths, chunks, write_movie_chunk)
+
+
+def load_book_ratings(loader):
+    paths = [CSV_PATHS["ratings"], CSV_PATHS["books"]]
+
+    def chunks(skip, limit):
+        parts = loader.parsed_chunks(
+            CSV_PATHS["books"], BOOK_COLUMNS, prepare_books, dtype={"ISBN": str}
+        )
+        books = pd.concat([part for _, part in parts], ignore_index=True)
+        books = books.drop_duplicates(subset="isbn").set_index("isbn")
+        for rows, ratings in loader.parsed_chunks(
+            CSV_PATHS["ratings"], RATING_COLUMNS, parse_rating_chunk,
+            limit=limit, skip=skip, dtype={"ISBN": str},
+        ):
+            yield rows, join_ratings(ratings, books)
+
+    return loader.write("book ratings", paths, chunks, write_rating_chunk)
+
+
+# name -> (load function, datasets that must finish first)
+DATASETS = {
+    "books": (load_books, ()),
+    "songs": (load_songs, ()),
+    "movies": (load_movies, ()),
+    "book ratings": (load_book_ratings, ("books",)),
+}
+
+
+def report_progress(loader, done, interval):
+    """Print one progress line for every dataset each `interval` seconds until `done` is set."""
+    while not done.wait(interval):
+        parts = [
+            f"{name}: {s.rows:,} rows ({s.rows_per_second:,.0f}/s)"
+            for name, s in loader.stats.items()
+        ]
+        print(" | ".join(parts), flush=True)
+
+
+def run(
+    workers=None,
+    chunk_size=STREAM_CHUNK_SIZE,
+    limit=None,
+    progress=PROGRESS_INTERVAL,
+    resume=False,
+):
+    """Load every dataset, concurrently where dependencies allow."""
+    loader = Loader(workers or os.cpu_count() or 1, chunk_size, limit, resume)
+    print(f"Parsing with {loader.workers} processes, writing on {len(DATASETS)} connections")
+
+    done = threading.Event()
+    reporter = threading.Thread(
+        target=report_progress, args=(loader, done, progress), daemon=True
+    )
+    reporter.start()
+    started = time.perf_counter()
+
+    futures = {}
+
+    def run_dataset(name):
+        load, after = DATASETS[name]
+        for dep in after:
+            futures[dep].result()  # re-raises if the dependency failed
+        loader.stats[name].started = time.perf_counter()
+        return load(loader)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(DATASETS)) as threads:
+            # Dependencies come first in DATASETS, so their futures exist
+            for name in DATASETS:
+                futures[name] = threads.submit(run_dataset, name)
+            for name, future in futures.items():
+                print(future.result().summary(), flush=True)
+    finally:
+        done.set()
+        loader.close()
+
+    total = sum(s.rows for s in loader.stats.values())
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s overall)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load every CSV dataset in parallel (process pool + pooled connections)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="parser processes (default: one per core)"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="rows to read from each CSV (default: all)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=STREAM_CHUNK_SIZE,
+        help="CSV rows per parse job and per commit",
+    )
+    parser.add_argument(
+        "--progress",
+        type=float,
+        default=PROGRESS_INTERVAL,
+        help="seconds between progress lines",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="checkpoint each chunk; continue an interrupted load, skip unchanged files",
+    )
+    args = parser.parse_args()
+
+    run(args.workers, args.chunk_size, args.limit, args.progress, args.resume)
+    print("✅ Done loading all datasets.")
@@ -0,0 +1,118 @@
+"""Personalized recommendations from a user's preferred genres (user_preferences)."""
+
+import heapq
+
+from cache_helpers import TTLCache
+from item_helpers import fetch_items, in_list
+
+# Best-rated items stored per genre in genre_top_items by build_similarity.py
+GENRE_TOP_N = 200
+
+RECOMMENDATION_LIMIT = 25
+
+# Weight of the normalized (0..1) rating: an item's score is its number of
+# preferred genres times (1 + RATING_WEIGHT * rating).
+RATING_WEIGHT = 1.0
+
+# genre_id -> [(item_id, rating), ...]; only changes when the tables are rebuilt
+GENRE_LIST_CACHE_CONFIG = {"maxsize": 2048, "ttl": 600}
+
+# user_id -> recommendations; also invalidated when the user's preferences change
+RECOMMENDATION_CACHE_CONFIG = {"maxsize": 4096, "ttl": 300}
+
+_genre_list_cache = TTLCache(
+    maxsize=GENRE_LIST_CACHE_CONFIG["maxsize"], ttl=GENRE_LIST_CACHE_CONFIG["ttl"]
+)
+_recommendation_cache = TTLCache(
+    maxsize=RECOMMENDATION_CACHE_CONFIG["maxsize"],
+    ttl=RECOMMENDATION_CACHE_CONFIG["ttl"],
+)
+
+
+def get_preferred_genres(cur, user_id):
+    """Sorted tuple of the user's preferred genre ids."""
+    cur.execute(
+        "SELECT genre_id FROM user_preferences WHERE user_id = %s ORDER BY genre_id",
+        (user_id,),
+    )
+    return tuple(row["genre_id"] for row in cur.fetchall())
+
+
+def get_genre_top_items(cur, genre_ids):
+    """{genre_id: [(item_id, rating), ...]} from the cache, loading misses in one query."""
+    lists = {}
+    missing = []
+    for genre_id in genre_ids:
+        items = _genre_list_cache.get(genre_id)
+        if items is None:
+            missing.append(genre_id)
+        else:
+            lists[genre_id] = items
+
+    if missing:
+        cur.execute(
+            f"""
+            SELECT genre_id, item_id, score
+            FROM genre_top_items
+            WHERE genre_id IN ({in_list(missing)})
+            ORDER BY genre_id, item_rank
+            """,
+            missing,
+        )
+        loaded = {genre_id: [] for genre_id in missing}
+        for row in cur.fetchall():
+            loaded[row["genre_id"]].append((row["item_id"], float(row["score"])))
+        for genre_id, items in loaded.items():
+            _genre_list_cache.set(genre_id, items)
+            lists[genre_id] = items
+    return lists
+
+
+def merge_genre_lists(genre_lists, limit):
+    """Top `limit` (item_id, overlap, score) over the merged per-genre lists.
+
+    Overlap is counted within the stored top-N lists, so it can miss a
+    preferred genre in which the item is not among the best rated.
+    """
+    merged = {}
+    for items in genre_lists.values():
+        for item_id, rating in items:
+            entry = merged.setdefault(item_id, [0, rating])
+            entry[0] += 1
+
+    scored = (
+        (overlap * (1 + RATING_WEIGHT * rating), overlap, item_id)
+        for item_id, (overlap, rating) in merged.items()
+    )
+    top = heapq.nsmallest(limit, scored, key=lambda s: (-s[0], s[2]))
+    return [(item_id, overlap, score) for score, overlap, item_id in top]
+
+
+def get_recommendations(cur, user_id, limit=RECOMMENDATION_LIMIT):
+    """Items for the user's preferred genres, best first, with their details.
+
+    Results are cached per user together with the genre set they were
+    computed for, so a preference change made through another process is
+    noticed on the next request.
+    """
+    genre_ids = get_preferred_genres(cur, user_id)
+    cached = _recommendation_cache.get(user_id)
+    if cached is not None and cached["genres"] == genre_ids:
+        return cached["items"][:limit]
+
+    ranked = merge_genre_lists(
+        get_genre_top_items(cur, genre_ids), RECOMMENDATION_LIMIT
+    )
+    details = fetch_items(cur, [item_id for item_id, _, _ in ranked])
+    items = [
+        dict(details[item_id], overlap=overlap, score=round(score, 4))
+        for item_id, overlap, score in ranked
+        if item_id in details
+    ]
+    _recommendation_cache.set(user_id, {"genres": genre_ids, "items": items})
+    return items[:limit]
+
+
+def invalidate_recommendations(user_id):
+    """Drop the user's cached recommendations (call after changing their preferences)."""
+    _recommendation_cache.delete(user_id)
@@ -0,0 +1,28 @@
+"""Recommendation routes (items for the logged-in user's preferred genres)."""
+
+from flask import Blueprint, render_template, session
+from db import get_connection
+from auth_decorators import login_required, permission_required
+from recommendation_helpers import get_recommendations
+
+# Create a Blueprint for recommendation routes
+recommendation_bp = Blueprint("recommendations", __name__)
+
+
+@recommendation_bp.route("/recommendations")
+@login_required
+@permission_required("read")
+def recommendations():
+    """
+    Items matching the user's genre preferences (set on /preferences)
+    - Score: number of preferred genres the item has x (1 + normalized rating)
+    - Merged from precomputed per-genre top lists (genre_top_items)
+    - Cached per user; refreshed when the preferences change
+    """
+    conn = get_connection()
+    cur = conn.cursor(dictionary=True)
+    items = get_recommendations(cur, session["user_id"])
+    cur.close()
+    conn.close()
+
+    return render_template("recommendations.html", items=items)
@@ -14,23 +14,30 @@ CREATE TABLE genres (
 
 CREATE TABLE creators (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(255) NOT NULL
+    name VARCHAR(255) NOT NULL,
+    FULLTEXT INDEX ft_creators_name (name),
+    UNIQUE INDEX uq_creators_name (name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE artists (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(255) NOT NULL
+    name VARCHAR(255) NOT NULL,
+    FULLTEXT INDEX ft_artists_name (name),
+    UNIQUE INDEX uq_artists_name (name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE authors (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(255) NOT NULL
+    name VARCHAR(255) NOT NULL,
+    FULLTEXT INDEX ft_authors_name (name),
+    UNIQUE INDEX uq_authors_name (name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE albums (
     id INT AUTO_INCREMENT PRIMARY KEY,
     title VARCHAR(255) NOT NULL,
-    year INT
+    year INT,
+    INDEX idx_albums_title_year (title, year)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================================
@@ -43,7 +50,10 @@ CREATE TABLE movies (
     year INT,
     imdb_rating DECIMAL(3,1),
     director_id INT,
-    FOREIGN KEY (director_id) REFERENCES creators(id)
+    FOREIGN KEY (director_id) REFERENCES creators(id),
+    INDEX idx_movies_year_id (year, id),
+    FULLTEXT INDEX ft_movies_title (title),
+    INDEX idx_movies_title_year (title, year)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE tv_shows (
@@ -63,7 +73,10 @@ CREATE TABLE songs (
     spotify_popularity INT,
     year INT,
     FOREIGN KEY (artist_id) REFERENCES artists(id),
-    FOREIGN KEY (album_id) REFERENCES albums(id)
+    FOREIGN KEY (album_id) REFERENCES albums(id),
+    INDEX idx_songs_year_id (year, id),
+    FULLTEXT INDEX ft_songs_title (title),
+    INDEX idx_songs_title_artist_album (title, artist_id, album_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE books (
@@ -72,7 +85,10 @@ CREATE TABLE books (
     author_id INT,
     year INT,
     avg_rating DECIMAL(3,2),
-    FOREIGN KEY (author_id) REFERENCES authors(id)
+    FOREIGN KEY (author_id) REFERENCES authors(id),
+    INDEX idx_books_year_id (year, id),
+    FULLTEXT INDEX ft_books_title (title),
+    INDEX idx_books_title_author_year (title, author_id, year)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================================
@@ -82,7 +98,8 @@ CREATE TABLE books (
 CREATE TABLE items (
     id INT AUTO_INCREMENT PRIMARY KEY,
     item_type ENUM('movie','tv','song','book') NOT NULL,
-    ref_id INT NOT NULL   -- ID from movies, tv_shows, songs, or books
+    ref_id INT NOT NULL,   -- ID from movies, tv_shows, songs, or books
+    UNIQUE INDEX uq_items_type_ref (item_type, ref_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================================
@@ -94,15 +111,54 @@ CREATE TABLE item_genres (
     item_id INT NOT NULL,
     genre_id INT NOT NULL,
     FOREIGN KEY (item_id) REFERENCES items(id),
-    FOREIGN KEY (genre_id) REFERENCES genres(id)
+    FOREIGN KEY (genre_id) REFERENCES genres(id),
+    UNIQUE INDEX uq_item_genres_item_genre (item_id, genre_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE ratings (
     id INT AUTO_INCREMENT PRIMARY KEY,
     item_id INT NOT NULL,
     source VARCHAR(100) NOT NULL,
+    source_key VARCHAR(64) NOT NULL DEFAULT '',
     rating DECIMAL(3,2),
-    FOREIGN KEY (item_id) REFERENCES items(id)
+    FOREIGN KEY (item_id) REFERENCES items(id),
+    INDEX idx_ratings_item_source (item_id, source),
+    UNIQUE INDEX uq_ratings_item_source_key (item_id, source, source_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Source row (TMDB id, ISBN, Spotify track) behind each item, with a hash
+-- of its loaded columns; delta_ingest.py diffs refreshed CSVs against it
+CREATE TABLE item_sources (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    source VARCHAR(50) NOT NULL,
+    natural_key VARCHAR(255) NOT NULL,
+    item_id INT NOT NULL,
+    row_hash BIGINT UNSIGNED NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (item_id) REFERENCES items(id),
+    UNIQUE INDEX uq_item_sources_source_key (source, natural_key),
+    INDEX idx_item_sources_item (item_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Top-K similar items per item, rebuilt by build_similarity.py (no foreign
+-- keys: the table is swapped in whole by RENAME TABLE)
+CREATE TABLE item_similar (
+    item_id INT NOT NULL,
+    neighbor_rank SMALLINT NOT NULL,
+    similar_item_id INT NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (item_id, neighbor_rank),
+    INDEX idx_item_similar_similar (similar_item_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Best-rated items per genre for /recommendations, rebuilt by
+-- build_similarity.py (no foreign keys, same RENAME TABLE swap)
+CREATE TABLE genre_top_items (
+    genre_id INT NOT NULL,
+    item_rank SMALLINT NOT NULL,
+    item_id INT NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (genre_id, item_rank)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ============================================
@@ -133,6 +189,25 @@ CREATE TABLE sessions (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
     started_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES app_users(id),
+    INDEX idx_sessions_user_started (user_id, started_at),
+    INDEX idx_sessions_started (started_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Logins per user per day, rolled up from sessions pruned by
+-- session_maintenance.py
+CREATE TABLE daily_logins (
+    login_date DATE NOT NULL,
+    user_id INT NOT NULL,
+    logins INT NOT NULL,
+    PRIMARY KEY (login_date, user_id),
+    INDEX idx_daily_logins_user_date (user_id, login_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Last request time per user (rate-limited writes, see auth_helpers.py)
+CREATE TABLE user_last_seen (
+    user_id INT PRIMARY KEY,
+    last_seen_at TIMESTAMP NOT NULL,
     FOREIGN KEY (user_id) REFERENCES app_users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -160,12 +235,52 @@ CREATE TABLE user_preferences (
     PRIMARY KEY (user_id, genre_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Version counters bumped on changes that invalidate in-process caches
+CREATE TABLE cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO cache_versions (name, version) VALUES ('rbac', 0);
+
+-- Last committed chunk of each data-loader source (see checkpoint_helpers.py)
+CREATE TABLE ingest_checkpoints (
+    source VARCHAR(100) PRIMARY KEY,
+    file_hash CHAR(64) NOT NULL,
+    chunk_size INT NOT NULL,
+    row_limit INT NULL,
+    chunks_done INT NOT NULL DEFAULT 0,
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Partitioned by month on created_at; audit_maintenance.py adds upcoming
+-- partitions and archives/drops expired ones. Partitioned tables cannot
+-- have foreign keys, and the primary key must include created_at.
 CREATE TABLE audit_logs (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     user_id INT NOT NULL,
     action VARCHAR(255) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES app_users(id)
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    INDEX idx_audit_logs_user_created (user_id, created_at),
+    INDEX idx_audit_logs_created_id (created_at, id),
+    INDEX idx_audit_logs_action_created (action, created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_old VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- Audit partitions exported and dropped by audit_maintenance.py
+CREATE TABLE audit_archives (
+    partition_name VARCHAR(64) PRIMARY KEY,
+    range_start TIMESTAMP NULL,
+    range_end TIMESTAMP NOT NULL,
+    row_count BIGINT NOT NULL,
+    path VARCHAR(512),
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 SET FOREIGN_KEY_CHECKS = 1;
\ No newline at end of file
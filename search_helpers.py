@@ -0,0 +1,228 @@
+"""Full-text search helpers for movies, songs and books."""
+
+import re
+
+from pagination_helpers import finish_page, get_page_size, read_cursor
+
+# InnoDB ignores words shorter than innodb_ft_min_token_size (default 3)
+# and its default stopwords; required (+) terms must skip them or nothing matches.
+MIN_TOKEN_LEN = 3
+FT_STOPWORDS = {
+    "about", "are", "com", "for", "from", "how", "that", "the", "this",
+    "was", "what", "when", "where", "who", "will", "with", "und", "www",
+}
+
+# Weight of a title match relative to a creator/artist/author name match
+TITLE_WEIGHT = 2.0
+
+# Weight of the normalized (0..1) rating added to full-text relevance
+RATING_WEIGHT = 1.0
+
+SEARCH_PAGE_SIZE = 25
+
+# Per media type: table, rating column (and its max value, used to
+# normalize ratings to 0..1) and the person table linked to it.
+SEARCH_SOURCES = {
+    "movie": {
+        "table": "movies",
+        "rating": "imdb_rating",
+        "rating_scale": 10,
+        "person_table": "creators",
+        "person_fk": "director_id",
+    },
+    "song": {
+        "table": "songs",
+        "rating": "spotify_popularity",
+        "rating_scale": 100,
+        "person_table": "artists",
+        "person_fk": "artist_id",
+    },
+    "book": {
+        "table": "books",
+        "rating": "avg_rating",
+        "rating_scale": 10,
+        "person_table": "authors",
+        "person_fk": "author_id",
+    },
+}
+
+
+def build_boolean_query(text):
+    """Turn free text into a BOOLEAN MODE query where every word is a required prefix.
+
+    Returns None when no word is long enough to be in the full-text index.
+    """
+    words = re.findall(r"\w+", (text or "").lower())
+    terms = [w for w in words if len(w) >= MIN_TOKEN_LEN and w not in FT_STOPWORDS]
+    if not terms:
+        return None
+    return " ".join(f"+{term}*" for term in dict.fromkeys(terms))
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def title_filter_clause(text, column="title"):
+    """SQL fragment + params filtering `column` by the user's search text.
+
+    Uses the FULLTEXT index when possible. Input made only of very short
+    words or stopwords falls back to a LIKE prefix match, which the
+    title-first B-tree indexes serve (as in /search).
+    """
+    boolean_query = build_boolean_query(text)
+    if boolean_query is None:
+        return f"{column} LIKE %s", [_escape_like(text.strip()) + "%"]
+    return f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE)", [boolean_query]
+
+
+def _hits_subquery(media_type, boolean_query):
+    """Derived table of (ref_id, relevance) for one media type.
+
+    Title hits and creator hits are found through their own FULLTEXT
+    indexes and summed per row, so a title that matches and is by a
+    matching creator ranks first.
+    """
+    src = SEARCH_SOURCES[media_type]
+    table = src["table"]
+    person_table = src["person_table"]
+    sql = f"""
+        SELECT ref_id, SUM(score) AS relevance
+        FROM (
+            SELECT id AS ref_id,
+                   MATCH(title) AGAINST (%s IN BOOLEAN MODE) * %s AS score
+            FROM {table}
+            WHERE MATCH(title) AGAINST (%s IN BOOLEAN MODE)
+            UNION ALL
+            SELECT m2.id AS ref_id,
+                   MATCH(p2.name) AGAINST (%s IN BOOLEAN MODE) AS score
+            FROM {person_table} p2
+            INNER JOIN {table} m2 ON m2.{src["person_fk"]} = p2.id
+            WHERE MATCH(p2.name) AGAINST (%s IN BOOLEAN MODE)
+        ) hits
+        GROUP BY ref_id
+    """
+    params = [boolean_query, TITLE_WEIGHT, boolean_query, boolean_query, boolean_query]
+    return sql, params
+
+
+def _prefix_hits_subquery(media_type, text):
+    """Like _hits_subquery(), for text the FULLTEXT index cannot match.
+
+    Short or stopword-only input ("Up", "It") is matched as a LIKE prefix
+    of the title or creator name, which the title/name B-tree indexes
+    serve. An exact title scores twice a prefix hit.
+    """
+    src = SEARCH_SOURCES[media_type]
+    table = src["table"]
+    person_table = src["person_table"]
+    prefix = _escape_like(text) + "%"
+    sql = f"""
+        SELECT ref_id, SUM(score) AS relevance
+        FROM (
+            SELECT id AS ref_id, IF(title = %s, 2, 1) * %s AS score
+            FROM {table}
+            WHERE title LIKE %s
+            UNION ALL
+            SELECT m2.id AS ref_id, 1 AS score
+            FROM {person_table} p2
+            INNER JOIN {table} m2 ON m2.{src["person_fk"]} = p2.id
+            WHERE p2.name LIKE %s
+        ) hits
+        GROUP BY ref_id
+    """
+    return sql, [text, TITLE_WEIGHT, prefix, prefix]
+
+
+def _ranked_subquery(media_type, hits):
+    """Matches of one media type joined to items, with a normalized 0..1 rating.
+
+    `hits` is the (sql, params) of a (ref_id, relevance) derived table.
+    """
+    src = SEARCH_SOURCES[media_type]
+    hits_sql, params = hits
+    norm = f"(m.{src['rating']} / {src['rating_scale']})"
+    sql = f"""
+        SELECT i.id AS item_id, i.item_type, m.id AS ref_id, m.title, m.year,
+               p.name AS creator, m.{src["rating"]} AS rating,
+               {norm} AS norm_rating,
+               ROUND(h.relevance + %s * COALESCE({norm}, 0), 6) AS score
+        FROM ({hits_sql}) h
+        INNER JOIN {src["table"]} m ON m.id = h.ref_id
+        INNER JOIN items i ON i.item_type = %s AND i.ref_id = m.id
+        LEFT JOIN {src["person_table"]} p ON p.id = m.{src["person_fk"]}
+    """
+    return sql, [RATING_WEIGHT] + params + [media_type]
+
+
+def search_items(cur, text, media_types, args):
+    """One ranked, keyset-paginated result list across several media types.
+
+    All types are merged by a single UNION ALL statement per page, so the
+    query count does not grow with the number of media types. Rows are
+    ranked by full-text relevance plus a normalized rating and paged on
+    (score, item_id) with the ?after= / ?before= cursors in `args`. Text
+    with no indexable word falls back to a title/creator prefix match.
+    Returns (rows, page) like fetch_year_id_page().
+    """
+    text = (text or "").strip()
+    boolean_query = build_boolean_query(text)
+    page_size = get_page_size(args, default=SEARCH_PAGE_SIZE)
+    if not text or not media_types:
+        return [], {"page_size": page_size, "next": None, "prev": None}
+
+    parts = []
+    params = []
+    for media_type in media_types:
+        if boolean_query is None:
+            hits = _prefix_hits_subquery(media_type, text)
+        else:
+            hits = _hits_subquery(media_type, boolean_query)
+        sql, part_params = _ranked_subquery(media_type, hits)
+        parts.append(sql)
+        params.extend(part_params)
+    query = "SELECT * FROM (" + " UNION ALL ".join(parts) + ") ranked WHERE 1=1"
+
+    cursor, backward = read_cursor(args)
+    if cursor is not None:
+        score, item_id = cursor
+        op = ">" if backward else "<"
+        query += f" AND (score {op} %s OR (score = %s AND item_id {op} %s))"
+        params.extend([score, score, item_id])
+
+    direction = "ASC" if backward else "DESC"
+    query += f" ORDER BY score {direction}, item_id {direction} LIMIT %s"
+    params.append(page_size + 1)
+
+    cur.execute(query, params)
+    return finish_page(
+        cur.fetchall(), page_size, cursor, backward, lambda r: [r["score"], r["item_id"]]
+    )
+
+
+def suggest_titles(cur, text, limit=10):
+    """Type-ahead: titles across all media types whose words start with the input."""
+    boolean_query = build_boolean_query(text)
+    if boolean_query is None:
+        return []
+
+    parts = []
+    params = []
+    for media_type, src in SEARCH_SOURCES.items():
+        parts.append(
+            f"""
+            (SELECT %s AS item_type, id, title,
+                    MATCH(title) AGAINST (%s IN BOOLEAN MODE) AS score
+             FROM {src["table"]}
+             WHERE MATCH(title) AGAINST (%s IN BOOLEAN MODE)
+             ORDER BY score DESC
+             LIMIT %s)
+            """
+        )
+        params.extend([media_type, boolean_query, boolean_query, limit])
+
+    cur.execute(
+        " UNION ALL ".join(parts) + " ORDER BY score DESC LIMIT %s",
+        params + [limit],
+    )
+    return cur.fetchall()
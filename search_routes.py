@@ -0,0 +1,57 @@
+"""Search routes (full-text search across movies, songs and books)."""
+
+from flask import Blueprint, render_template, request, jsonify
+from db import get_connection
+from auth_decorators import permission_required
+from search_helpers import SEARCH_SOURCES, search_items, suggest_titles
+
+# Create a Blueprint for search routes
+search_bp = Blueprint("search", __name__)
+
+MAX_SUGGESTIONS = 10
+
+
+@search_bp.route("/search")
+@permission_required("read")
+def search():
+    """
+    Unified ranked search over every media type in the items catalog
+    - ?q= words to look for in titles and creator/artist/author names
+    - Optional ?type=movie|song|book to restrict to one media type
+    - Results merged into one list ranked by relevance + normalized rating
+    - Keyset pagination via ?after= / ?before= cursors and ?page_size=
+    """
+    q = request.args.get("q", default="", type=str).strip()
+    media_type = request.args.get("type", default="", type=str)
+    types = [media_type] if media_type in SEARCH_SOURCES else list(SEARCH_SOURCES)
+
+    rows, page = [], None
+    if q:
+        conn = get_connection()
+        cur = conn.cursor(dictionary=True)
+        rows, page = search_items(cur, q, types, request.args)
+        cur.close()
+        conn.close()
+
+    return render_template(
+        "search.html", q=q, media_type=media_type, results=rows, page=page
+    )
+
+
+@search_bp.route("/search/suggest")
+@permission_required("read")
+def suggest():
+    """Type-ahead suggestions as JSON: [{item_type, id, title}, ...]."""
+    q = request.args.get("q", default="", type=str).strip()
+    if not q:
+        return jsonify([])
+
+    conn = get_connection()
+    cur = conn.cursor(dictionary=True)
+    rows = suggest_titles(cur, q, limit=MAX_SUGGESTIONS)
+    cur.close()
+    conn.close()
+
+    return jsonify(
+        [{"item_type": r["item_type"], "id": r["id"], "title": r["title"]} for r in rows]
+    )
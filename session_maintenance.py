@@ -0,0 +1,97 @@
+"""Roll up and prune old login sessions.
+
+Sessions older than the retention window are counted per user and day
+into daily_logins and then deleted, one day per transaction, so a crash
+never counts a day twice or loses it. Run it daily (e.g. from cron) to
+keep the sessions table bounded.
+
+Usage:
+  python session_maintenance.py [--keep-days N]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from db import get_connection
+
+SESSION_RETENTION_CONFIG = {
+    "keep_days": 30,  # Days of individual sessions kept in the sessions table
+}
+
+
+def next_session_day(cur, after, before):
+    """Midnight of the first day with sessions in [after, before), or None.
+
+    `after` may be None for no lower bound.
+    """
+    if after is None:
+        cur.execute("SELECT MIN(started_at) FROM sessions WHERE started_at < %s", (before,))
+    else:
+        cur.execute(
+            """
+            SELECT MIN(started_at) FROM sessions
+            WHERE started_at >= %s AND started_at < %s
+            """,
+            (after, before),
+        )
+    first = cur.fetchone()[0]
+    if first is None:
+        return None
+    return datetime(first.year, first.month, first.day)
+
+
+def rollup_sessions(conn, keep_days, now=None):
+    """Move sessions from before the retention cutoff into daily_logins.
+
+    Returns (days, sessions) rolled up.
+    """
+    today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoff = today - timedelta(days=keep_days)
+    cur = conn.cursor()
+    days = sessions = 0
+    day = next_session_day(cur, None, cutoff)
+    while day is not None:
+        end = min(day + timedelta(days=1), cutoff)
+        cur.execute(
+            """
+            INSERT INTO daily_logins (login_date, user_id, logins)
+            SELECT * FROM (
+                SELECT DATE(started_at) AS login_date, user_id, COUNT(*) AS n
+                FROM sessions
+                WHERE started_at >= %s AND started_at < %s
+                GROUP BY login_date, user_id
+            ) AS day_logins
+            ON DUPLICATE KEY UPDATE logins = daily_logins.logins + day_logins.n
+            """,
+            (day, end),
+        )
+        cur.execute(
+            "DELETE FROM sessions WHERE started_at >= %s AND started_at < %s",
+            (day, end),
+        )
+        sessions += cur.rowcount
+        conn.commit()
+        days += 1
+        day = next_session_day(cur, end, cutoff)
+    cur.close()
+    return days, sessions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Roll sessions older than the retention window into daily_logins."
+    )
+    parser.add_argument(
+        "--keep-days",
+        type=int,
+        default=SESSION_RETENTION_CONFIG["keep_days"],
+        help="days of individual sessions to keep",
+    )
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        days, sessions = rollup_sessions(conn, args.keep_days)
+    finally:
+        conn.close()
+    print(f"Rolled up {sessions:,} sessions from {days} days into daily_logins")
+    print("✅ Done.")
@@ -0,0 +1,33 @@
+"""Lookups in the precomputed item_similar table (built by build_similarity.py)."""
+
+from item_helpers import fetch_items
+
+# Neighbors stored per item; the route never shows more than this
+TOP_K = 20
+
+
+def get_similar_items(cur, item_id, limit=TOP_K):
+    """Most similar items to `item_id`, best first, with their details.
+
+    One primary-key range read on item_similar plus the batched detail
+    queries of fetch_items(), whatever the size of the catalog.
+    """
+    cur.execute(
+        """
+        SELECT similar_item_id, score
+        FROM item_similar
+        WHERE item_id = %s
+        ORDER BY neighbor_rank
+        LIMIT %s
+        """,
+        (item_id, limit),
+    )
+    neighbors = cur.fetchall()
+    details = fetch_items(cur, [n["similar_item_id"] for n in neighbors])
+
+    # Neighbors deleted since the last build have no details and are skipped
+    return [
+        dict(details[n["similar_item_id"]], score=round(float(n["score"]), 4))
+        for n in neighbors
+        if n["similar_item_id"] in details
+    ]
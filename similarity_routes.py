@@ -0,0 +1,30 @@
+"""Similar-items routes ("discover similar content")."""
+
+from flask import Blueprint, abort, render_template
+from db import get_connection
+from auth_decorators import permission_required
+from item_helpers import fetch_items
+from similarity_helpers import get_similar_items
+
+# Create a Blueprint for similar-item routes
+similarity_bp = Blueprint("similarity", __name__)
+
+
+@similarity_bp.route("/items/<int:item_id>/similar")
+@permission_required("read")
+def similar_items(item_id):
+    """
+    Items most similar to one item, across movies, songs and books
+    - Read from the precomputed item_similar table (build_similarity.py)
+    - Similarity: cosine over shared genres and creator/artist/album/author
+    """
+    conn = get_connection()
+    cur = conn.cursor(dictionary=True)
+    item = fetch_items(cur, [item_id]).get(item_id)
+    similar = get_similar_items(cur, item_id) if item else []
+    cur.close()
+    conn.close()
+
+    if item is None:
+        abort(404)
+    return render_template("similar.html", item=item, similar=similar)
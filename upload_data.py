@@ -1,7 +1,15 @@
+import json
+import sys
+import unicodedata
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 import mysql.connector
+import numpy as np
 import pandas as pd
-import ast
-import re
 
 # -----------------------------
 # DB CONNECTION CONFIG
@@ -18,40 +26,137 @@ def get_connection():
     return mysql.connector.connect(**DB_CONFIG)
 
 
+def normalize_key(value):
+    """Normalize a lookup key the way MySQL's utf8mb4_0900_ai_ci collation compares it.
+
+    Case and accents are ignored, so "Beyoncé" and "beyonce" share a key.
+    This approximates the collation; resolve_names() lets MySQL match
+    whatever it misses.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.isascii():
+        return value.casefold()
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+# -----------------------------
+# LOADER-SCOPED DIMENSION CACHE
+# -----------------------------
+class DimensionCache:
+    """Name -> id cache for the dimension tables, shared by one loader run.
+
+    Pre-warmed with one SELECT per table, then filled in as the loader
+    inserts new rows, so repeated names never go back to MySQL.
+    """
+
+    NAME_TABLES = ("genres", "artists", "authors", "creators")
+
+    def __init__(self, conn):
+        self.ids = {table: {} for table in self.NAME_TABLES}
+        self.ids["albums"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.warm(conn)
+
+    def warm(self, conn):
+        cur = conn.cursor()
+        for table in self.NAME_TABLES:
+            cur.execute(f"SELECT id, name FROM {table}")
+            for row_id, name in cur.fetchall():
+                self.ids[table].setdefault(normalize_key(name), row_id)
+        cur.execute("SELECT id, title, year FROM albums")
+        for row_id, title, year in cur.fetchall():
+            self.ids["albums"].setdefault((normalize_key(title), year), row_id)
+        cur.close()
+
+    def _key(self, table, key):
+        if table == "albums":
+            return (normalize_key(key[0]), key[1])
+        return normalize_key(key)
+
+    def get(self, table, key):
+        """Cached id for `key` (a name, or (title, year) for albums), or None."""
+        row_id = self.ids[table].get(self._key(table, key))
+        if row_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row_id
+
+    def add(self, table, key, row_id):
+        self.ids[table][self._key(table, key)] = row_id
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (
+            f"dimension cache: {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate, {self.hits} DB lookups saved)"
+        )
+
+
 # -----------------------------
 # HELPER: GET OR CREATE ROWS
 # -----------------------------
-def get_or_create_genre(conn, name):
+def get_or_create_genre(conn, name, cache=None):
+    if cache is not None:
+        cached_id = cache.get("genres", name)
+        if cached_id is not None:
+            return cached_id
+
     cur = conn.cursor()
     cur.execute("SELECT id FROM genres WHERE name = %s", (name,))
     row = cur.fetchone()
     if row:
         cur.close()
+        if cache is not None:
+            cache.add("genres", name, row[0])
         return row[0]
 
     cur.execute("INSERT INTO genres (name) VALUES (%s)", (name,))
     conn.commit()
     gid = cur.lastrowid
     cur.close()
+    if cache is not None:
+        cache.add("genres", name, gid)
     return gid
 
 
-def get_or_create_artist(conn, name):
+def get_or_create_artist(conn, name, cache=None):
+    if cache is not None:
+        cached_id = cache.get("artists", name)
+        if cached_id is not None:
+            return cached_id
+
     cur = conn.cursor()
     cur.execute("SELECT id FROM artists WHERE name = %s", (name,))
     row = cur.fetchone()
     if row:
         cur.close()
+        if cache is not None:
+            cache.add("artists", name, row[0])
         return row[0]
 
     cur.execute("INSERT INTO artists (name) VALUES (%s)", (name,))
     conn.commit()
     aid = cur.lastrowid
     cur.close()
+    if cache is not None:
+        cache.add("artists", name, aid)
     return aid
 
 
-def get_or_create_album(conn, title, year=None):
+def get_or_create_album(conn, title, year=None, cache=None):
+    if cache is not None:
+        cached_id = cache.get("albums", (title, year))
+        if cached_id is not None:
+            return cached_id
+
     cur = conn.cursor()
     cur.execute(
         "SELECT id FROM albums WHERE title = %s AND (year = %s OR (%s IS NULL AND year IS NULL))",
@@ -60,42 +165,64 @@ def get_or_create_album(conn, title, year=None):
     row = cur.fetchone()
     if row:
         cur.close()
+        if cache is not None:
+            cache.add("albums", (title, year), row[0])
         return row[0]
 
     cur.execute("INSERT INTO albums (title, year) VALUES (%s, %s)", (title, year))
     conn.commit()
     alb_id = cur.lastrowid
     cur.close()
+    if cache is not None:
+        cache.add("albums", (title, year), alb_id)
     return alb_id
 
 
-def get_or_create_author(conn, name):
+def get_or_create_author(conn, name, cache=None):
+    if cache is not None:
+        cached_id = cache.get("authors", name)
+        if cached_id is not None:
+            return cached_id
+
     cur = conn.cursor()
     cur.execute("SELECT id FROM authors WHERE name = %s", (name,))
     row = cur.fetchone()
     if row:
         cur.close()
+        if cache is not None:
+            cache.add("authors", name, row[0])
         return row[0]
 
     cur.execute("INSERT INTO authors (name) VALUES (%s)", (name,))
     conn.commit()
     auth_id = cur.lastrowid
     cur.close()
+    if cache is not None:
+        cache.add("authors", name, auth_id)
     return auth_id
 
 
-def get_or_create_creator(conn, name):
+def get_or_create_creator(conn, name, cache=None):
+    if cache is not None:
+        cached_id = cache.get("creators", name)
+        if cached_id is not None:
+            return cached_id
+
     cur = conn.cursor()
     cur.execute("SELECT id FROM creators WHERE name = %s", (name,))
     row = cur.fetchone()
     if row:
         cur.close()
+        if cache is not None:
+            cache.add("creators", name, row[0])
         return row[0]
 
     cur.execute("INSERT INTO creators (name) VALUES (%s)", (name,))
     conn.commit()
     creator_id = cur.lastrowid
     cur.close()
+    if cache is not None:
+        cache.add("creators", name, creator_id)
     return creator_id
 
 
@@ -164,19 +291,14 @@ def get_or_create_song(conn, title, artist_id, album_id, popularity, year=None):
     return song_id
 
 
+# items and item_genres have UNIQUE keys on (item_type, ref_id) and
+# (item_id, genre_id): upserts rely on them instead of probing first.
 def get_or_create_item(conn, item_type, ref_id):
     cur = conn.cursor()
+    # LAST_INSERT_ID(id) makes lastrowid the existing id when the row is there
     cur.execute(
-        "SELECT id FROM items WHERE item_type = %s AND ref_id = %s",
-        (item_type, ref_id),
-    )
-    row = cur.fetchone()
-    if row:
-        cur.close()
-        return row[0]
-
-    cur.execute(
-        "INSERT INTO items (item_type, ref_id) VALUES (%s, %s)",
+        "INSERT INTO items (item_type, ref_id) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
         (item_type, ref_id),
     )
     conn.commit()
@@ -188,16 +310,8 @@ def get_or_create_item(conn, item_type, ref_id):
 def get_or_create_item_genre(conn, item_id, genre_id):
     cur = conn.cursor()
     cur.execute(
-        "SELECT id FROM item_genres WHERE item_id = %s AND genre_id = %s",
-        (item_id, genre_id),
-    )
-    row = cur.fetchone()
-    if row:
-        cur.close()
-        return row[0]
-
-    cur.execute(
-        "INSERT INTO item_genres (item_id, genre_id) VALUES (%s, %s)",
+        "INSERT INTO item_genres (item_id, genre_id) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
         (item_id, genre_id),
     )
     conn.commit()
@@ -206,236 +320,451 @@ def get_or_create_item_genre(conn, item_id, genre_id):
     return ig_id
 
 
-def add_rating(conn, item_id, source, rating_value):
+# -----------------------------
+# HELPER: SET-BASED ITEM UPSERTS
+# -----------------------------
+IN_BATCH = 1000  # Max values in one IN (...) list
+
+
+def chunked(values, size):
+    """Yield successive lists of at most `size` values."""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def resolve_item_ids(conn, pairs):
+    """Map (item_type, ref_id) pairs to items.id, creating the missing items.
+
+    One multi-row INSERT IGNORE adds whatever is missing, then one SELECT
+    per item type (and IN batch) reads every id back. Does not commit.
+    """
+    pairs = list(dict.fromkeys(p for p in pairs if p[1] is not None))
+    if not pairs:
+        return {}
+
     cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO ratings (item_id, source, rating) VALUES (%s, %s, %s)",
-        (item_id, source, rating_value),
+    cur.executemany(
+        "INSERT IGNORE INTO items (item_type, ref_id) VALUES (%s, %s)", pairs
     )
+    ref_ids_by_type = {}
+    for item_type, ref_id in pairs:
+        ref_ids_by_type.setdefault(item_type, []).append(ref_id)
+
+    ids = {}
+    for item_type, ref_ids in ref_ids_by_type.items():
+        for batch in chunked(ref_ids, IN_BATCH):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cur.execute(
+                f"SELECT ref_id, id FROM items "
+                f"WHERE item_type = %s AND ref_id IN ({placeholders})",
+                [item_type] + batch,
+            )
+            for ref_id, item_id in cur.fetchall():
+                ids[(item_type, ref_id)] = item_id
+    cur.close()
+    return ids
+
+
+def link_item_genres(conn, pairs):
+    """Insert (item_id, genre_id) links in one multi-row INSERT IGNORE.
+
+    Links that already exist are skipped. Does not commit.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT IGNORE INTO item_genres (item_id, genre_id) VALUES (%s, %s)", pairs
+    )
+    cur.close()
+
+
+# Reloading a source updates its ratings in place: (item_id, source,
+# source_key) is unique, source_key being e.g. the rating's User-ID.
+UPSERT_RATING_SQL = """
+    INSERT INTO ratings (item_id, source, source_key, rating)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE rating = VALUES(rating)
+"""
+
+
+def add_rating(conn, item_id, source, rating_value, source_key=""):
+    cur = conn.cursor()
+    cur.execute(UPSERT_RATING_SQL, (item_id, source, source_key, rating_value))
+    conn.commit()
+    cur.close()
+
+
+def add_ratings(conn, rows):
+    """Upsert (item_id, source, source_key, rating) rows as one multi-row INSERT."""
+    if not rows:
+        return
+    cur = conn.cursor()
+    cur.executemany(UPSERT_RATING_SQL, rows)
     conn.commit()
     cur.close()
 
 
 # -----------------------------
-# LOAD BOOKS (Books.csv)
+# HELPER: VECTORIZED CSV PARSING
 # -----------------------------
-def load_books(books_csv, limit=20):
-    df = pd.read_csv(books_csv, nrows=limit)
-    conn = get_connection()
+# These run over a whole DataFrame (or chunk) before any DB work and
+# return clean columns; loaders then only look values up.
+def records(df):
+    """DataFrame rows as dicts with NaN/NA turned into None (ready for the DB)."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def parse_json_list(raw):
+    """Parse a JSON list cell such as TMDB's genres/crew ([] if missing or malformed)."""
+    if not isinstance(raw, str) or not raw.strip():
+        return []
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return []
+    return value if isinstance(value, list) else []
+
+
+def parse_years(series):
+    """First four-digit run of each cell as the year (MM/DD/YYYY, YYYY-MM-DD, ...)."""
+    digits = series.astype("string").str.extract(r"(\d{4})", expand=False)
+    return pd.to_numeric(digits, errors="coerce").astype("Int64")
+
+
+def parse_ints(series):
+    """Whole-number column (non-numeric cells become NA)."""
+    return np.trunc(pd.to_numeric(series, errors="coerce")).astype("Int64")
+
+
+def genre_names(genres_col):
+    """Exploded (row index -> genre name) Series from a TMDB genres column."""
+    names = genres_col.map(parse_json_list).explode().dropna().str.get("name")
+    return names[names.notna() & (names != "")]
+
+
+def director_lookup(credits_df):
+    """TMDB movie_id -> first Director name, from the credits crew JSON."""
+    movie_ids = pd.to_numeric(credits_df["movie_id"], errors="coerce")
+    crew = credits_df["crew"].map(parse_json_list)
+    crew.index = movie_ids
+    crew = crew[crew.index.notna()].explode().dropna()
+    names = crew.str.get("name")
+    directors = names[(crew.str.get("job") == "Director") & names.notna()]
+    directors = directors[~directors.index.duplicated(keep="first")]
+    directors.index = directors.index.astype("int64")
+    return directors
+
+
+def prepare_books(df):
+    """isbn, title, author, year columns from Books.csv rows."""
+    return pd.DataFrame(
+        {
+            "isbn": df["ISBN"].astype(str),
+            "title": df["Book-Title"].astype(str),
+            "author": df["Book-Author"].astype(str),
+            # Year may be missing or non-int
+            "year": parse_ints(df["Year-Of-Publication"]),
+        },
+        index=df.index,
+    )
 
-    for _, row in df.iterrows():
-        title = str(row["Book-Title"])
-        author_name = str(row["Book-Author"])
 
-        # Year may be missing or non-int
-        year = None
-        try:
-            year = int(row["Year-Of-Publication"])
-        except Exception:
-            year = None
+def prepare_songs(df):
+    """title, artist (first listed), album, popularity, genre columns from song.csv rows."""
+    genre = (
+        df["track_genre"].astype("string")
+        if "track_genre" in df.columns
+        else pd.Series(pd.NA, index=df.index, dtype="string")
+    )
+    return pd.DataFrame(
+        {
+            "title": df["track_name"].astype(str),
+            "artist": df["artists"].astype(str).str.split(";").str[0].str.strip(),
+            "album": df["album_name"].astype(str),
+            "popularity": pd.to_numeric(df["popularity"], errors="coerce")
+            .fillna(0)
+            .astype(int),
+            "genre": genre.where(genre != ""),
+        },
+        index=df.index,
+    )
+
+
+def prepare_movies(movies_df, directors):
+    """title, year, vote_avg, director columns from TMDB movie rows.
+
+    `directors` is the director_lookup() Series of the credits file.
+    Genres are parsed separately with genre_names().
+    """
+    tmdb_ids = pd.to_numeric(movies_df["id"], errors="coerce").astype("Int64")
+    return pd.DataFrame(
+        {
+            "title": movies_df["title"].astype(str),
+            "year": parse_years(movies_df["release_date"]),
+            "vote_avg": pd.to_numeric(movies_df["vote_average"], errors="coerce"),
+            "director": tmdb_ids.map(directors),
+        },
+        index=movies_df.index,
+    )
+
+
+# -----------------------------
+# HELPER: STREAMING CSV READS
+# -----------------------------
+# Files are read chunk by chunk and only the columns the loaders use are
+# kept, so memory stays bounded by the chunk size rather than file size.
+STREAM_CHUNK_SIZE = 5000
+
+BOOK_COLUMNS = ("ISBN", "Book-Title", "Book-Author", "Year-Of-Publication")
+SONG_COLUMNS = ("track_name", "artists", "album_name", "popularity", "track_genre")
+MOVIE_COLUMNS = ("id", "title", "release_date", "vote_average", "genres")
+CREDIT_COLUMNS = ("movie_id", "crew")
+RATING_COLUMNS = ("User-ID", "ISBN", "Book-Rating")
+
+
+def read_csv_chunks(
+    path, columns, chunk_size=STREAM_CHUNK_SIZE, limit=None, skip=0, **kwargs
+):
+    """Iterate over a CSV as DataFrames of at most `chunk_size` rows.
+
+    Only `columns` are parsed (ones missing from the file are skipped);
+    the first `skip` data rows are passed over without parsing and
+    `limit` caps the number of rows read after them.
+    """
+    wanted = set(columns)
+    if skip:
+        kwargs["skiprows"] = lambda i: 0 < i <= skip
+    return pd.read_csv(
+        path,
+        usecols=lambda c: c in wanted,
+        chunksize=chunk_size,
+        nrows=limit,
+        **kwargs,
+    )
+
+
+def load_directors(credits_csv, chunk_size=STREAM_CHUNK_SIZE):
+    """director_lookup() of a whole credits CSV, streamed chunk by chunk.
+
+    Only the resulting movie_id -> director name Series stays in memory,
+    not the crew/cast JSON.
+    """
+    # Handle BOM and encoding issues in credits CSV
+    chunks = read_csv_chunks(
+        credits_csv, CREDIT_COLUMNS, chunk_size, encoding="utf-8-sig"
+    )
+    directors = pd.concat([director_lookup(chunk) for chunk in chunks])
+    return directors[~directors.index.duplicated(keep="first")]
+
+
+def load_book_lookup(books_csv, chunk_size=STREAM_CHUNK_SIZE):
+    """prepare_books() rows of Books.csv indexed by ISBN (first row per ISBN wins)."""
+    chunks = read_csv_chunks(books_csv, BOOK_COLUMNS, chunk_size, dtype={"ISBN": str})
+    books = pd.concat([prepare_books(chunk) for chunk in chunks], ignore_index=True)
+    return books.drop_duplicates(subset="isbn").set_index("isbn")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def memory_summary():
+    peak = peak_rss_mb()
+    return f"peak RSS: {peak:,.0f} MB" if peak is not None else "peak RSS: n/a"
 
-        author_id = get_or_create_author(conn, author_name)
-        book_id = get_or_create_book(conn, title, author_id, year)
-        get_or_create_item(conn, "book", book_id)
+
+# -----------------------------
+# LOAD BOOKS (Books.csv)
+# -----------------------------
+def load_books(books_csv, limit=20, chunk_size=STREAM_CHUNK_SIZE):
+    conn = get_connection()
+    cache = DimensionCache(conn)
+
+    chunks = read_csv_chunks(
+        books_csv, BOOK_COLUMNS, chunk_size, limit, dtype={"ISBN": str}
+    )
+    for chunk in chunks:
+        book_ids = []
+        for book in records(prepare_books(chunk)):
+            author_id = get_or_create_author(conn, book["author"], cache)
+            book_ids.append(
+                get_or_create_book(conn, book["title"], author_id, book["year"])
+            )
+        resolve_item_ids(conn, [("book", book_id) for book_id in book_ids])
+        conn.commit()
 
     conn.close()
     print(f"Inserted up to {limit} books (with authors + items).")
+    print(cache.summary())
+    print(memory_summary())
 
 
 # -----------------------------
 # LOAD SONGS (song.csv)
 # -----------------------------
-def load_songs(song_csv, limit=20):
-    df = pd.read_csv(song_csv, nrows=limit)
+def load_songs(song_csv, limit=20, chunk_size=STREAM_CHUNK_SIZE):
     conn = get_connection()
+    cache = DimensionCache(conn)
 
-    for _, row in df.iterrows():
-        title = str(row["track_name"])
-        artists_field = str(row["artists"])
-        main_artist_name = artists_field.split(";")[0].strip()
-
-        album_name = str(row["album_name"])
-        popularity = int(row["popularity"]) if not pd.isna(row["popularity"]) else 0
+    for chunk in read_csv_chunks(song_csv, SONG_COLUMNS, chunk_size, limit):
+        song_genres = []
+        for song in records(prepare_songs(chunk)):
+            # No year column in your sample → keep None
+            year = None
 
-        # No year column in your sample → keep None
-        year = None
+            artist_id = get_or_create_artist(conn, song["artist"], cache)
+            album_id = get_or_create_album(conn, song["album"], year, cache)
+            song_id = get_or_create_song(
+                conn, song["title"], artist_id, album_id, song["popularity"], year
+            )
 
-        artist_id = get_or_create_artist(conn, main_artist_name)
-        album_id = get_or_create_album(conn, album_name, year)
-        song_id = get_or_create_song(conn, title, artist_id, album_id, popularity, year)
-        item_id = get_or_create_item(conn, "song", song_id)
+            # Genre from track_genre column (simple 1-genre case)
+            gid = get_or_create_genre(conn, song["genre"], cache) if song["genre"] else None
+            song_genres.append((song_id, gid))
 
-        # Genre from track_genre column (simple 1-genre case)
-        if "track_genre" in df.columns:
-            genre_name = str(row["track_genre"])
-            if genre_name and genre_name != "nan":
-                gid = get_or_create_genre(conn, genre_name)
-                get_or_create_item_genre(conn, item_id, gid)
+        # Items and genre links for the whole chunk in two statements
+        item_ids = resolve_item_ids(conn, [("song", sid) for sid, _ in song_genres])
+        link_item_genres(
+            conn,
+            [(item_ids[("song", sid)], gid) for sid, gid in song_genres if gid],
+        )
+        conn.commit()
 
     conn.close()
     print(f"Inserted up to {limit} songs (with artists, albums, items, genres).")
+    print(cache.summary())
+    print(memory_summary())
 
 
 # -----------------------------
 # LOAD MOVIES (tmdb_5000_movies.csv + tmdb_5000_credits.csv)
 # -----------------------------
-def load_movies(movies_csv, credits_csv, limit=1000):
-    movies_df = pd.read_csv(movies_csv, nrows=limit)
-    # Handle BOM and encoding issues in credits CSV
-    credits_df = pd.read_csv(credits_csv, encoding="utf-8-sig")
-
-    # Create a lookup dictionary for credits by movie_id
-    credits_lookup = {}
-    for _, cred_row in credits_df.iterrows():
-        movie_id = cred_row.get("movie_id")
-        if pd.notna(movie_id):
-            try:
-                # Try to convert to int, skip if it fails
-                movie_id_int = int(
-                    float(movie_id)
-                )  # Use float first to handle numeric strings
-                credits_lookup[movie_id_int] = cred_row
-            except (ValueError, TypeError):
-                # Skip rows where movie_id can't be converted to int
-                continue
+def load_movies(movies_csv, credits_csv, limit=1000, chunk_size=STREAM_CHUNK_SIZE):
+    directors = load_directors(credits_csv, chunk_size)
 
     conn = get_connection()
-
-    for _, row in movies_df.iterrows():
-        title = str(row["title"])
-        movie_id_tmdb = row.get("id")
-
-        # Extract year from release_date (format: MM/DD/YYYY or YYYY-MM-DD)
-        release_date = row.get("release_date", None)
-        year = None
-        if (
-            pd.notna(release_date)
-            and isinstance(release_date, str)
-            and release_date.strip()
-        ):
-            try:
-                # Try to parse different date formats
-                if "/" in release_date:
-                    # Format: MM/DD/YYYY
-                    parts = release_date.split("/")
-                    if len(parts) >= 3:
-                        year = int(parts[2])
-                elif "-" in release_date:
-                    # Format: YYYY-MM-DD
-                    year = int(release_date.split("-")[0])
-                else:
-                    # Try to extract first 4 digits if it's a different format
-                    match = re.search(r"\d{4}", release_date)
-                    if match:
-                        year = int(match.group())
-            except (ValueError, IndexError, AttributeError):
-                year = None
-
-        vote_avg = None
-        if not pd.isna(row["vote_average"]):
-            try:
-                vote_avg = float(row["vote_average"])
-            except Exception:
-                vote_avg = None
-
-        # Extract director from credits CSV
-        director_id = None
-        if pd.notna(movie_id_tmdb) and int(movie_id_tmdb) in credits_lookup:
-            cred_row = credits_lookup[int(movie_id_tmdb)]
-            crew_raw = cred_row.get("crew", "")
-
-            if isinstance(crew_raw, str) and crew_raw.strip():
-                try:
-                    # crew is string like: "[{"job": "Director", "name": "James Cameron"}, ...]"
-                    crew_list = ast.literal_eval(crew_raw)
-                    for crew_member in crew_list:
-                        if crew_member.get("job") == "Director":
-                            director_name = crew_member.get("name")
-                            if director_name:
-                                director_id = get_or_create_creator(conn, director_name)
-                                break  # Take the first director found
-                except Exception:
-                    # if parse fails, just skip director for this movie
-                    pass
-
-        movie_id = get_or_create_movie(conn, title, year, vote_avg, director_id)
-        item_id = get_or_create_item(conn, "movie", movie_id)
-
-        # Parse genres JSON-like field
-        genres_raw = row.get("genres", "")
-        if isinstance(genres_raw, str) and genres_raw.strip():
-            try:
-                # genres is string like: "[{"id": 28, "name": "Action"}, ...]"
-                genres_list = ast.literal_eval(genres_raw)
-                for g in genres_list:
-                    gname = g.get("name")
-                    if gname:
-                        gid = get_or_create_genre(conn, gname)
-                        get_or_create_item_genre(conn, item_id, gid)
-            except Exception:
-                # if parse fails, just skip genres for this movie
-                pass
-
+    cache = DimensionCache(conn)
+
+    for chunk in read_csv_chunks(movies_csv, MOVIE_COLUMNS, chunk_size, limit):
+        # Parse every column up front: year, rating, director and genres
+        movies = prepare_movies(chunk, directors)
+        genres = genre_names(chunk["genres"]).groupby(level=0).agg(list)
+
+        loaded = []
+        for idx, movie in zip(movies.index, records(movies)):
+            director_id = None
+            if movie["director"]:
+                director_id = get_or_create_creator(conn, movie["director"], cache)
+
+            movie_id = get_or_create_movie(
+                conn, movie["title"], movie["year"], movie["vote_avg"], director_id
+            )
+            genre_ids = [
+                get_or_create_genre(conn, gname, cache) for gname in genres.get(idx, [])
+            ]
+            loaded.append((movie_id, genre_ids, movie["vote_avg"]))
+
+        # Items, genre links and ratings for the whole chunk, set-based
+        item_ids = resolve_item_ids(conn, [("movie", mid) for mid, _, _ in loaded])
+        link_item_genres(
+            conn,
+            [
+                (item_ids[("movie", mid)], gid)
+                for mid, genre_ids, _ in loaded
+                for gid in genre_ids
+            ],
+        )
         # Store movie rating from vote_average into ratings table
-        if vote_avg is not None:
-            add_rating(conn, item_id, "tmdb_vote_average", vote_avg)
+        add_ratings(
+            conn,
+            [
+                (item_ids[("movie", mid)], "tmdb_vote_average", "", vote_avg)
+                for mid, _, vote_avg in loaded
+                if vote_avg is not None
+            ],
+        )
+        conn.commit()
 
     conn.close()
     print(f"Inserted up to {limit} movies (with directors, items, genres, ratings).")
+    print(cache.summary())
+    print(memory_summary())
 
 
 # -----------------------------
 # LOAD BOOK RATINGS (Ratings.csv → ratings for book items)
 # -----------------------------
-def load_book_ratings(ratings_csv, books_csv, limit=20):
+def load_book_ratings(ratings_csv, books_csv, limit=20, chunk_size=STREAM_CHUNK_SIZE):
     """
     Use Ratings.csv (User-ID, ISBN, Book-Rating) + Books.csv to
     find the book info, ensure the book + item exist, then insert into ratings table.
+
+    Books.csv is indexed by ISBN once; Ratings.csv is then streamed in
+    chunks, each distinct ISBN resolves its book/item ids a single time
+    and every chunk's ratings go in as one multi-row insert.
+    limit=None loads the whole file.
     """
-    ratings_df = pd.read_csv(ratings_csv, nrows=limit)
-    books_df = pd.read_csv(books_csv)  # full, to find ISBN matches
+    # full, to find ISBN matches; ratings without book info in Books.csv are skipped
+    books = load_book_lookup(books_csv, chunk_size)
 
     conn = get_connection()
+    cache = DimensionCache(conn)
 
-    for _, row in ratings_df.iterrows():
-        isbn = str(row["ISBN"])
-        rating_val = None
-        try:
-            rating_val = float(row["Book-Rating"])
-        except Exception:
-            continue
-
-        # Find matching book row in Books.csv by ISBN
-        match = books_df[books_df["ISBN"] == isbn]
-        if match.empty:
-            # no book info for that ISBN in Books.csv → skip
-            continue
-
-        b = match.iloc[0]
-        title = str(b["Book-Title"])
-        author_name = str(b["Book-Author"])
-
-        year = None
-        try:
-            year = int(b["Year-Of-Publication"])
-        except Exception:
-            year = None
-
-        author_id = get_or_create_author(conn, author_name)
-        book_id = get_or_create_book(conn, title, author_id, year)
-        item_id = get_or_create_item(conn, "book", book_id)
+    item_ids = {}
+    read = inserted = 0
+    chunks = read_csv_chunks(
+        ratings_csv, RATING_COLUMNS, chunk_size, limit, dtype={"ISBN": str}
+    )
+    for chunk in chunks:
+        read += len(chunk)
+        chunk = chunk.assign(
+            rating=pd.to_numeric(chunk["Book-Rating"], errors="coerce")
+        ).dropna(subset=["ISBN", "rating"])
+        chunk = chunk[chunk["ISBN"].isin(books.index)]
+
+        new_isbns = [isbn for isbn in chunk["ISBN"].unique() if isbn not in item_ids]
+        new_books = books.loc[new_isbns]
+        book_ids = {}
+        for isbn, b in zip(new_books.index, records(new_books)):
+            author_id = get_or_create_author(conn, b["author"], cache)
+            book_ids[isbn] = get_or_create_book(conn, b["title"], author_id, b["year"])
+        resolved = resolve_item_ids(conn, [("book", bid) for bid in book_ids.values()])
+        for isbn, book_id in book_ids.items():
+            item_ids[isbn] = resolved[("book", book_id)]
 
         # Source label so you know where it came from
-        add_rating(conn, item_id, "book_ratings_csv", rating_val)
+        rows = [
+            (item_ids[isbn], "book_ratings_csv", str(user_id), float(rating))
+            for isbn, user_id, rating in zip(
+                chunk["ISBN"], chunk["User-ID"], chunk["rating"]
+            )
+        ]
+        add_ratings(conn, rows)
+        inserted += len(rows)
 
     conn.close()
-    print(f"Inserted up to {limit} book ratings (into ratings table).")
+    print(
+        f"Inserted {inserted} book ratings for {len(item_ids)} books "
+        f"(of {read} ratings read)."
+    )
+    print(cache.summary())
+    print(memory_summary())
 
 
 # -----------------------------
 # MAIN
 # -----------------------------
 if __name__ == "__main__":
+    import argparse
+
     # Update these paths to where your CSVs actually are:
     BOOKS_CSV = "csvs/Books.csv"
     SONG_CSV = "csvs/song.csv"
@@ -443,12 +772,56 @@ if __name__ == "__main__":
     CREDITS_CSV = "csvs/tmdb_5000_credits.csv"
     RATINGS_CSV = "csvs/Ratings.csv"
 
-    # How many rows of each to insert
-    N = 30
-
-    load_books(BOOKS_CSV, limit=N)
-    load_songs(SONG_CSV, limit=N)
-    load_movies(MOVIES_CSV, CREDITS_CSV, limit=N)
-    load_book_ratings(RATINGS_CSV, BOOKS_CSV, limit=N)
+    parser = argparse.ArgumentParser(description="Load the CSV datasets into MySQL.")
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="use the set-based bulk loaders (batched lookups, multi-row inserts)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="rows to read from each CSV (default: 30, or all rows with --bulk)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=STREAM_CHUNK_SIZE,
+        help="CSV rows read at a time (and per commit with --bulk); bounds memory use",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="bulk load with per-chunk checkpoints: continue an interrupted run "
+        "and skip files unchanged since a complete load (implies --bulk)",
+    )
+    args = parser.parse_args()
+
+    if args.bulk or args.resume:
+        from bulk_ingest import (
+            bulk_load_books,
+            bulk_load_songs,
+            bulk_load_movies,
+            bulk_load_book_ratings,
+        )
+
+        options = {
+            "limit": args.limit,
+            "chunk_size": args.chunk_size,
+            "resume": args.resume,
+        }
+        bulk_load_books(BOOKS_CSV, **options)
+        bulk_load_songs(SONG_CSV, **options)
+        bulk_load_movies(MOVIES_CSV, CREDITS_CSV, **options)
+        bulk_load_book_ratings(RATINGS_CSV, BOOKS_CSV, **options)
+    else:
+        # How many rows of each to insert
+        N = args.limit or 30
+
+        load_books(BOOKS_CSV, limit=N, chunk_size=args.chunk_size)
+        load_songs(SONG_CSV, limit=N, chunk_size=args.chunk_size)
+        load_movies(MOVIES_CSV, CREDITS_CSV, limit=N, chunk_size=args.chunk_size)
+        load_book_ratings(RATINGS_CSV, BOOKS_CSV, limit=N, chunk_size=args.chunk_size)
 
     print("✅ Done inserting sample data into your schema.")
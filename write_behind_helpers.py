@@ -0,0 +1,197 @@
+"""Write-behind batching: rows are queued in memory and inserted by a background thread."""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+import mysql.connector
+
+from db import get_connection
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Log the "queue full" warning for the first dropped row and every Nth after
+DROP_WARNING_EVERY = 1000
+
+# Errors caused by the data of a single row (FK/unique violations, bad
+# values): the rest of a failed batch is retried row by row. Anything else
+# (lost connection, bad SQL) fails the whole batch.
+ROW_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError)
+
+
+class BatchWriter:
+    """Bounded queue of rows drained by one worker thread into multi-row INSERTs.
+
+    add() only enqueues, so callers never wait on the database. The worker
+    flushes when `batch_size` rows are pending or `flush_interval` seconds
+    after the oldest pending row. When the queue is full, add() blocks for
+    at most `put_timeout` seconds (back-pressure on a burst); if the
+    writer still cannot keep up the row is dropped and counted, rather
+    than stalling the request. Pending rows are flushed at interpreter
+    exit. If a batch is rejected because of one row's data (e.g. a foreign
+    key violation), its rows are retried one by one so only that row is
+    lost.
+
+    `sql` is a single-row INSERT ... VALUES (%s, ...) statement; the
+    connector's executemany() sends each batch as one multi-row INSERT.
+    """
+
+    def __init__(
+        self,
+        name,
+        sql,
+        max_queue=10000,
+        batch_size=500,
+        flush_interval=1.0,
+        put_timeout=0.05,
+        connect=get_connection,
+    ):
+        self.name = name
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._connect = connect
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._counts = {
+            "queued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+        }
+        atexit.register(self.close)
+
+    def _ensure_worker(self):
+        # Started lazily, and again in a forked child (threads do not survive fork)
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-writer", daemon=True
+                )
+                self._thread.start()
+
+    def add(self, row):
+        """Queue one row (a tuple of the INSERT's parameters). Returns False if dropped."""
+        if self._closed:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            dropped = self._count("dropped", 1)
+            if dropped % DROP_WARNING_EVERY == 1:
+                logger.warning("%s writer: queue full, %d rows dropped so far", self.name, dropped)
+            return False
+        self._count("queued", 1)
+        return True
+
+    def _count(self, key, n):
+        with self._lock:
+            self._counts[key] += n
+            return self._counts[key]
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        conn = None
+        written = 0
+        try:
+            conn = self._connect()
+            cur = conn.cursor()
+            try:
+                try:
+                    cur.executemany(self.sql, batch)
+                    conn.commit()
+                    written = len(batch)
+                except ROW_ERRORS as e:
+                    conn.rollback()
+                    logger.warning(
+                        "%s writer: batch of %d rows rejected (%s), retrying row by row",
+                        self.name, len(batch), e,
+                    )
+                    written = self._write_rows(conn, cur, batch)
+            finally:
+                cur.close()
+            self._count("flushes", 1)
+        except Exception:
+            # Keep the worker alive for later batches
+            logger.exception(
+                "%s writer: failed to write %d rows", self.name, len(batch) - written
+            )
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+        finally:
+            self._count("written", written)
+            self._count("failed", len(batch) - written)
+            if conn is not None:
+                conn.close()
+
+    def _write_rows(self, conn, cur, batch):
+        """Insert `batch` one row at a time, skipping rows the database rejects.
+
+        Returns the number of rows written. A rejected row only rolls back
+        its own statement, so the rest are committed together.
+        """
+        written = 0
+        for row in batch:
+            try:
+                cur.execute(self.sql, row)
+                written += 1
+            except ROW_ERRORS as e:
+                logger.warning("%s writer: dropped row %r: %s", self.name, row, e)
+        conn.commit()
+        return written
+
+    def close(self, timeout=10):
+        """Flush pending rows and stop the worker (also run at interpreter exit)."""
+        self._closed = True
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        # A full queue still takes the sentinel once the worker drains a batch
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def stats(self):
+        """Return queued/written/dropped/failed counters and the current backlog."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["pending"] = self._queue.qsize()
+        return counts